@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import random
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+import pandas as pd
+
+from ..io.load_data import _detect_columns, load_batch
+
+# Loader original (lê todas as colunas e só depois escolhe id/texto), mantido como referência de paridade.
+
+
+def legacy_load(path: Path) -> Tuple[List[str], List[str]]:
+    if path.suffix.lower() == ".csv":
+        df = pd.read_csv(path)
+    else:
+        with path.open("r", encoding="utf-8") as f:
+            df = pd.DataFrame([json.loads(line) for line in f if line.strip()])
+    id_col, text_col = _detect_columns(list(df.columns))
+    ids = [str(i) for i in range(len(df))] if id_col is None else [str(v) for v in df[id_col].tolist()]
+    texts = ["" if pd.isna(t) else str(t) for t in df[text_col].tolist()]
+    return ids, texts
+
+
+def projected_load(path: Path) -> Tuple[List[str], List[str]]:
+    batch = load_batch(path)
+    return batch.ids, batch.texts
+
+
+_WORDS = (
+    "solicito informações sobre contrato processo pedido acesso servidor documento cópia ata "
+    "reunião licitação obra escola hospital Secretaria Saúde Distrito Federal Administração"
+).split()
+
+
+def make_wide_files(out_dir: Path, n: int, extra_cols: int, n_words: int, seed: int) -> List[Path]:
+    """Gera o mesmo export largo em .csv e .jsonl: id, texto e `extra_cols` colunas de metadados."""
+    rng = random.Random(seed)
+    meta = [f"meta_{i:02d}" for i in range(extra_cols)]
+    header = ["protocolo"] + meta[: extra_cols // 2] + ["texto"] + meta[extra_cols // 2:]
+    csv_path, jsonl_path = out_dir / "wide.csv", out_dir / "wide.jsonl"
+    with csv_path.open("w", newline="", encoding="utf-8") as fc, jsonl_path.open("w", encoding="utf-8") as fj:
+        w = csv.writer(fc)
+        w.writerow(header)
+        for i in range(n):
+            row = {"protocolo": 100000 + i, "texto": " ".join(rng.choice(_WORDS) for _ in range(n_words))}
+            for j, col in enumerate(meta):
+                kind = j % 3
+                row[col] = rng.randint(0, 10**6) if kind == 0 else (rng.random() if kind == 1 else f"orgao-{rng.randint(0, 99)}")
+            w.writerow([row[c] for c in header])
+            fj.write(json.dumps(row, ensure_ascii=False) + "\n")
+    return [csv_path, jsonl_path]
+
+
+def _time(fn: Callable, path: Path, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(path)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _peak_mb(fn: Callable, path: Path) -> float:
+    tracemalloc.start()
+    try:
+        fn(path)
+        return tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Paridade + benchmark do loader (leitura projetada vs. todas as colunas).")
+    ap.add_argument("--input", action="append", default=[], help="Arquivo real .csv/.jsonl (pode repetir); sem ele gera exports largos")
+    ap.add_argument("--n", type=int, default=50_000, help="Linhas do export gerado")
+    ap.add_argument("--extra_cols", type=int, default=40, help="Colunas de metadados do export gerado")
+    ap.add_argument("--words", type=int, default=40, help="Palavras por texto no export gerado")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [Path(p) for p in args.input] or make_wide_files(Path(tmp), args.n, args.extra_cols, args.words, args.seed)
+
+        bad = [p.name for p in paths if legacy_load(p) != projected_load(p)]
+        print(f"paridade: {len(paths)} arquivos, {len(bad)} divergências {bad if bad else ''}")
+        if bad:
+            return 1
+
+        print(f"\n{'arquivo':<15}{'MB':>7}{'legado (s)':>12}{'projetado (s)':>15}{'speedup':>9}{'pico legado/proj. (MB)':>25}")
+        for p in paths:
+            t_old = _time(legacy_load, p, args.repeat)
+            t_new = _time(projected_load, p, args.repeat)
+            peak = f"{_peak_mb(legacy_load, p):.0f} / {_peak_mb(projected_load, p):.0f}"
+            size = p.stat().st_size / 2**20
+            print(f"{p.name:<15}{size:>7.1f}{t_old:>12.3f}{t_new:>15.3f}{t_old / t_new:>8.2f}x{peak:>25}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import time
+from pathlib import Path
+from typing import Dict, Any, List
+
+from ..features.regex_features import SIGNAL_KEYS, regex_signals
+from ..models.make_synth_dataset import inject_pii
+
+# Implementação original (nove varreduras por texto), mantida como referência de paridade.
+_LEGACY_EMAIL = re.compile(r"[A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,}", re.IGNORECASE)
+_LEGACY_CPF = re.compile(r"\b\d{3}\.?\d{3}\.?\d{3}-?\d{2}\b")
+_LEGACY_PHONE = re.compile(r"\b(?:\+?55\s*)?(?:\(?\d{2}\)?\s*)?(?:9\d{4}|\d{4})-?\d{4}\b")
+_LEGACY_RG = re.compile(r"\b\d{1,2}\.?\d{3}\.?\d{3}-?[0-9Xx]\b")
+_LEGACY_ZIP = re.compile(r"\b\d{5}-?\d{3}\b")
+_LEGACY_NAME = re.compile(r"\b[A-ZÁÀÂÃÉÈÊÍÌÎÓÒÔÕÚÙÛÇ][a-záàâãéèêíìîóòôõúùûç]+\s+[A-ZÁÀÂÃÉÈÊÍÌÎÓÒÔÕÚÙÛÇ][a-záàâãéèêíìîóòôõúùûç]+\b")
+
+_WORDS = (
+    "solicito informações sobre contrato processo pedido acesso servidor documento cópia ata "
+    "reunião licitação obra escola hospital Secretaria Saúde Distrito Federal Administração "
+    "Regional nº 2023 art. 5º Lei 12.527 protocolo valor R$ 1.500,00 em 10/05/2024"
+).split()
+
+
+# Nomes saem do gazetteer (bench.names compara com a heurística antiga); a paridade cobre o resto.
+_PARITY_KEYS = [k for k in SIGNAL_KEYS if k not in ("has_name_like", "name_count")]
+
+
+def legacy_regex_signals(text: str) -> Dict[str, Any]:
+    return {
+        "has_email": bool(_LEGACY_EMAIL.search(text)),
+        "has_cpf": bool(_LEGACY_CPF.search(text)),
+        "has_phone": bool(_LEGACY_PHONE.search(text)),
+        "has_rg": bool(_LEGACY_RG.search(text)),
+        "has_zip": bool(_LEGACY_ZIP.search(text)),
+        "has_name_like": bool(_LEGACY_NAME.search(text)),
+        "email_count": len(_LEGACY_EMAIL.findall(text)),
+        "cpf_count": len(_LEGACY_CPF.findall(text)),
+        "phone_count": len(_LEGACY_PHONE.findall(text)),
+    }
+
+
+def make_texts(n: int, n_words: int, pii_rate: float, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    out = []
+    for _ in range(n):
+        text = " ".join(rng.choice(_WORDS) for _ in range(n_words))
+        if rng.random() < pii_rate:
+            text, _ = inject_pii(text, rng)
+        out.append(text)
+    return out
+
+
+def check_parity(texts: List[str]) -> int:
+    """Compara o scanner com a implementação original; devolve o número de divergências."""
+    bad = 0
+    for t in texts:
+        for variant in (t, t.lower(), t.upper(), "X" + t.replace(" ", "")):
+            new, old = regex_signals(variant), legacy_regex_signals(variant)
+            if any(new[k] != old[k] for k in _PARITY_KEYS):
+                bad += 1
+                if bad <= 5:
+                    print("DIVERGÊNCIA:", repr(variant[:200]))
+    return bad
+
+
+def _time(fn, texts: List[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for t in texts:
+            fn(t)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Paridade + micro-benchmark do scanner de regex (textos curtos e longos).")
+    ap.add_argument("--input", default=None, help="Arquivo real opcional (.xlsx/.csv/.jsonl) para a checagem de paridade")
+    ap.add_argument("--n", type=int, default=2000, help="Textos por cenário")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+
+    scenarios = {
+        "curto": make_texts(args.n, 30, 0.5, args.seed),
+        "longo": make_texts(max(args.n // 10, 1), 1500, 0.5, args.seed + 1),
+        "longo_sem_pii": [t.lower() for t in make_texts(max(args.n // 10, 1), 1500, 0.0, args.seed + 2)],
+    }
+
+    parity_texts = [t for texts in scenarios.values() for t in texts]
+    if args.input:
+        from ..io.load_data import load_batch
+        parity_texts += load_batch(Path(args.input)).texts
+    bad = check_parity(parity_texts)
+    print(f"paridade: {len(parity_texts)} textos, {bad} divergências")
+    if bad:
+        return 1
+
+    print(f"\n{'cenário':<15}{'textos':>8}{'legado (s)':>12}{'scanner (s)':>13}{'speedup':>9}")
+    for name, texts in scenarios.items():
+        t_old = _time(legacy_regex_signals, texts, args.repeat)
+        t_new = _time(regex_signals, texts, args.repeat)
+        print(f"{name:<15}{len(texts):>8}{t_old:>12.4f}{t_new:>13.4f}{t_old / t_new:>8.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
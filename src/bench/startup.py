@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from ..config import PROJECT_ROOT
+
+HEAVY = ("sklearn", "scipy", "joblib", "pandas", "numpy")
+# o modo regex não pode carregar nada disso
+FORBIDDEN_IN_REGEX = ("sklearn", "scipy", "joblib")
+# Orçamento (folgado) do tempo de imports do modo regex, em ms de -X importtime. Fica
+# também abaixo de REGEX_VS_ML_RATIO x o custo de importar só a pilha de ML na mesma
+# máquina, o que vale em máquinas lentas sem depender do número absoluto.
+REGEX_IMPORT_BUDGET_MS = 1500.0
+REGEX_VS_ML_RATIO = 0.8
+ML_STACK = "import sklearn.linear_model, sklearn.feature_extraction.text, scipy.sparse, joblib"
+
+_PROBE = """
+import json, sys
+from src.run import main
+rc = main(json.loads(sys.argv[1]))
+heavy = sorted({m.split('.')[0] for m in sys.modules} & set(json.loads(sys.argv[2])))
+print('__PROBE__' + json.dumps({'rc': rc, 'heavy': heavy}))
+"""
+
+
+def parse_importtime(stderr: str) -> Dict[str, float]:
+    """Soma o tempo cumulativo (ms) dos imports de primeiro nível de `-X importtime`."""
+    total = 0.0
+    per_pkg: Dict[str, float] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line.split("|")
+        try:
+            cumulative = float(parts[1])
+        except ValueError:
+            continue  # cabeçalho
+        name = parts[2]
+        if name.startswith("   ") and not name.startswith("    "):  # primeiro nível: 1 + 2 espaços
+            mod = name.strip()
+            total += cumulative
+            root = mod.split(".")[0]
+            per_pkg[root] = per_pkg.get(root, 0.0) + cumulative
+    out = {"total_ms": total / 1000.0}
+    for pkg in HEAVY:
+        if pkg in per_pkg:
+            out[f"{pkg}_ms"] = per_pkg[pkg] / 1000.0
+    return out
+
+
+def measure_mode(mode: str, input_path: Path, model: str, out_dir: Path) -> dict:
+    argv = ["--input", str(input_path), "--output", str(out_dir / f"preds_{mode}.csv"), "--mode", mode, "--model", model]
+    cmd = [sys.executable, "-X", "importtime", "-c", _PROBE, json.dumps(argv), json.dumps(list(HEAVY))]
+    t0 = time.perf_counter()
+    proc = subprocess.run(cmd, cwd=PROJECT_ROOT, capture_output=True, text=True)
+    wall = time.perf_counter() - t0
+    if proc.returncode != 0:
+        raise RuntimeError(f"modo {mode} falhou:\n{proc.stderr[-2000:]}")
+    probe = next(json.loads(l[len("__PROBE__"):]) for l in proc.stdout.splitlines() if l.startswith("__PROBE__"))
+    return {"mode": mode, "wall_s": wall, "imports": parse_importtime(proc.stderr), "heavy_modules": probe["heavy"]}
+
+
+def ml_stack_import_ms() -> float:
+    """Tempo de imports (ms) da pilha de ML num processo novo: referência para o modo regex."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", ML_STACK],
+                          cwd=PROJECT_ROOT, capture_output=True, text=True, check=True)
+    return parse_importtime(proc.stderr)["total_ms"]
+
+
+def budget_failures(regex: dict, ml_ms: float) -> List[str]:
+    """Violações do orçamento de partida do modo regex (`regex` = resultado de measure_mode)."""
+    failures = []
+    leaked = [m for m in regex["heavy_modules"] if m in FORBIDDEN_IN_REGEX]
+    if leaked:
+        failures.append(f"modo regex importou {leaked}")
+    ms = regex["imports"]["total_ms"]
+    if ms > REGEX_IMPORT_BUDGET_MS:
+        failures.append(f"imports do modo regex: {ms:.0f} ms > orçamento de {REGEX_IMPORT_BUDGET_MS:.0f} ms")
+    if ms > REGEX_VS_ML_RATIO * ml_ms:
+        failures.append(f"imports do modo regex: {ms:.0f} ms > {REGEX_VS_ML_RATIO} x pilha de ML ({ml_ms:.0f} ms)")
+    return failures
+
+
+def _tiny_input(path: Path) -> None:
+    with path.open("w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["id", "texto"])
+        w.writerow(["1", "Solicito cópia do contrato. CPF 123.456.789-10"])
+        w.writerow(["2", "Pedido de informação sobre obras na escola"])
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Mede o custo de inicialização (imports) de cada modo do src.run.")
+    ap.add_argument("--input", default=None, help="Entrada opcional; sem ela usa um CSV mínimo (mede só a partida)")
+    ap.add_argument("--model", default="artifacts/models/hybrid_tfidf_logreg.joblib", help="Modelo híbrido para o modo hybrid")
+    ap.add_argument("--json_out", default=None, help="Grava os resultados em JSON")
+    args = ap.parse_args()
+
+    results: List[dict] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_dir = Path(tmp)
+        input_path = Path(args.input) if args.input else tmp_dir / "tiny.csv"
+        if not args.input:
+            _tiny_input(input_path)
+        modes = ["regex", "auto"] + (["hybrid"] if Path(args.model).exists() else [])
+        for mode in modes:
+            results.append(measure_mode(mode, input_path.resolve(), str(Path(args.model).resolve()), tmp_dir))
+
+    print(f"{'modo':<8}{'total (s)':>10}{'imports (ms)':>14}  pacotes pesados")
+    for r in results:
+        print(f"{r['mode']:<8}{r['wall_s']:>10.3f}{r['imports']['total_ms']:>14.1f}  {', '.join(r['heavy_modules'])}")
+
+    if args.json_out:
+        Path(args.json_out).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.json_out).write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+    regex = next(r for r in results if r["mode"] == "regex")
+    ml_ms = ml_stack_import_ms()
+    failures = budget_failures(regex, ml_ms)
+    for f in failures:
+        print("FALHA:", f)
+    if failures:
+        return 1
+    print("OK: modo regex não importa", ", ".join(FORBIDDEN_IN_REGEX),
+          f"e fica no orçamento ({regex['imports']['total_ms']:.0f} ms; pilha de ML: {ml_ms:.0f} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
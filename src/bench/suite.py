@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import platform
+import random
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List
+
+import pandas as pd
+
+from ..config import Defaults, PROJECT_ROOT
+from ..models import predict, predict_hybrid
+from ..models.make_synth_dataset import inject_pii
+
+# Vocabulário de pedidos e-SIC (sem PII); a PII vem do inject_pii do make_synth_dataset.
+_OPENINGS = [
+    "Prezados, solicito", "Venho por meio deste solicitar", "Gostaria de obter", "Requeiro, com base na Lei 12.527/2011,",
+    "Solicito acesso a", "Peço informações sobre",
+]
+_SUBJECTS = [
+    "cópia do contrato de prestação de serviços", "relação de servidores lotados na Administração Regional",
+    "valores pagos no exercício de 2023", "atas das reuniões do conselho", "cronograma da obra da escola classe",
+    "processo licitatório da Secretaria de Saúde", "andamento do processo SEI 00060-00012345/2023-11",
+    "quantitativo de leitos de UTI no Distrito Federal", "gastos com diárias e passagens", "lista de espera da creche",
+]
+_FILLERS = [
+    "conforme previsto na legislação vigente", "referente ao período de janeiro a dezembro", "com detalhamento por unidade",
+    "em formato aberto", "incluindo anexos e pareceres", "da Região Administrativa de Ceilândia", "no âmbito do GDF",
+    "para fins de controle social", "desde 2019", "com os respectivos valores unitários",
+]
+
+
+def make_text(rng: random.Random, n_words: int) -> str:
+    parts = [rng.choice(_OPENINGS), rng.choice(_SUBJECTS)]
+    while sum(len(p.split()) for p in parts) < n_words:
+        parts.append(rng.choice(_FILLERS) if rng.random() < 0.7 else rng.choice(_SUBJECTS))
+    return " ".join(parts) + "."
+
+
+def generate_corpus(path: Path, n: int, pii_rate: float, words_min: int, words_max: int, seed: int) -> Path:
+    """Grava um corpus e-SIC sintético em CSV, em streaming (memória constante)."""
+    rng = random.Random(seed)
+    with path.open("w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["Protocolo", "Órgão", "Texto Mascarado", "label"])
+        for i in range(n):
+            text = make_text(rng, rng.randint(words_min, words_max))
+            label = 0
+            if rng.random() < pii_rate:
+                text, _ = inject_pii(text, rng)
+                label = 1
+            w.writerow([f"{i:010d}", "SEEDF", text, label])
+    return path
+
+
+def _bench_models(model: str | None, corpus: Path, work: Path, sample: int, seed: int) -> Dict[str, Path]:
+    """Modelos medidos: o .joblib (dado ou treinado rápido) e, quando exportável, o artefato linear."""
+    import joblib
+
+    from ..models.linear_scorer import export_linear
+
+    if model:
+        bundle = joblib.load(model)
+        path = Path(model)
+    else:
+        bundle = _quick_model(corpus, sample, seed)
+        path = work / "quick_model.joblib"
+        joblib.dump(bundle, path)
+    models = {"predict_hybrid": path}
+    try:
+        models["predict_hybrid_linear"] = export_linear(bundle, work / "linear")
+    except ValueError:
+        pass
+    return models
+
+
+def _quick_model(corpus: Path, sample: int, seed: int) -> dict:
+    """Treina um bundle híbrido pequeno a partir do corpus (quando --model não é dado)."""
+    from scipy.sparse import hstack, csr_matrix
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+
+    from ..features.matrix import regex_feature_matrix
+    from ..features.regex_features import REGEX_FEATURE_COLS
+
+    df = pd.read_csv(corpus, nrows=sample, dtype={"Protocolo": str})
+    texts = df["Texto Mascarado"].astype(str).tolist()
+    X_num, _ = regex_feature_matrix(texts, REGEX_FEATURE_COLS)
+    vec = TfidfVectorizer(ngram_range=(1, 2), min_df=2, max_df=0.95)
+    X = hstack([vec.fit_transform(texts), csr_matrix(X_num)])
+    clf = LogisticRegression(max_iter=400, C=2.0, random_state=seed).fit(X, df["label"].to_numpy())
+    return {"vectorizer": vec, "model": clf, "regex_feature_cols": REGEX_FEATURE_COLS}
+
+
+def _profiled_run(run, profile: Path, *args, **kwargs) -> Dict[str, dict]:
+    """Roda o `run` de produção com --profile e devolve os estágios gravados no perfil."""
+    run(*args, profile_path=str(profile), **kwargs)
+    return json.loads(profile.read_text(encoding="utf-8"))["stages"]
+
+
+def bench_predict(corpus: Path, out_dir: Path, threshold: float = 0.35) -> Dict[str, dict]:
+    """Estágios do predict.py (regex), medidos pelo próprio run()."""
+    return _profiled_run(predict.run, out_dir / "profile_regex.json",
+                         corpus, str(out_dir / "preds_regex.csv"), threshold=threshold)
+
+
+def bench_predict_hybrid(corpus: Path, out_dir: Path, chunk_size: int, model: Path,
+                         alpha: float = 0.70, threshold: float = 0.30, force_thr: float = 0.35) -> Dict[str, dict]:
+    """Estágios do predict_hybrid.py em streaming, medidos pelo próprio run()."""
+    return _profiled_run(predict_hybrid.run, out_dir / f"profile_{Path(model).name}.json",
+                         corpus, str(model), str(out_dir / "preds_hybrid.csv"), alpha=alpha, threshold=threshold,
+                         chunk_size=chunk_size, force_thr=force_thr)
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Estágios cujo rows/s caiu mais que `tolerance` (fração) em relação ao baseline."""
+    regressions = []
+    for scenario, pipelines in current["results"].items():
+        for pipeline, stages in pipelines.items():
+            for stage, st in stages.items():
+                ref = baseline.get("results", {}).get(scenario, {}).get(pipeline, {}).get(stage)
+                if not ref or not ref.get("rows_per_s") or not st.get("rows_per_s"):
+                    continue
+                ratio = st["rows_per_s"] / ref["rows_per_s"]
+                if ratio < 1.0 - tolerance:
+                    regressions.append(f"{scenario}/{pipeline}/{stage}: {ratio:.2f}x do baseline")
+    return regressions
+
+
+def _git_rev() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Suíte de benchmark: throughput e pico de memória por estágio.")
+    ap.add_argument("--sizes", default="10000", help="Tamanhos de corpus, separados por vírgula (ex.: 10000,1000000)")
+    ap.add_argument("--pii_rate", type=float, default=0.3, help="Proporção de registros com PII injetada")
+    ap.add_argument("--words", default="20,200", help="Faixa de palavras por texto (min,max)")
+    ap.add_argument("--chunk_size", type=int, default=Defaults.chunk_size)
+    ap.add_argument("--model", default=None, help="Bundle híbrido .joblib; sem ele um modelo rápido é treinado no corpus")
+    ap.add_argument("--train_sample", type=int, default=20_000, help="Registros usados no modelo rápido")
+    ap.add_argument("--seed", type=int, default=Defaults.seed)
+    ap.add_argument("--json_out", default="artifacts/reports/bench.json", help="Resultados em JSON")
+    ap.add_argument("--compare", default=None, help="JSON de uma execução anterior para detectar regressões")
+    ap.add_argument("--tolerance", type=float, default=0.20, help="Queda de rows/s tolerada antes de acusar regressão")
+    ap.add_argument("--workdir", default=None, help="Diretório dos corpora/saídas (padrão: temporário)")
+    args = ap.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    wmin, wmax = (int(x) for x in args.words.split(","))
+    results: Dict[str, dict] = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        work = Path(args.workdir or tmp)
+        work.mkdir(parents=True, exist_ok=True)
+        models: Dict[str, Path] = {}
+        for n in sizes:
+            scenario = f"n={n}"
+            corpus = work / f"corpus_{n}_{args.pii_rate}_{wmin}-{wmax}.csv"
+            if not corpus.exists():
+                t0 = time.perf_counter()
+                generate_corpus(corpus, n, args.pii_rate, wmin, wmax, args.seed)
+                print(f"[{scenario}] corpus gerado em {time.perf_counter() - t0:.1f}s ({corpus.stat().st_size / 1e6:.1f} MB)")
+            if not models:
+                models = _bench_models(args.model, corpus, work, args.train_sample, args.seed)
+
+            results[scenario] = {"predict": bench_predict(corpus, work)}
+            for pipeline, model in models.items():
+                results[scenario][pipeline] = bench_predict_hybrid(corpus, work, args.chunk_size, model)
+            for pipeline, stages in results[scenario].items():
+                print(f"\n[{scenario}] {pipeline}")
+                print(f"  {'estágio':<17}{'seg':>9}{'linhas/s':>13}{'pico RSS (MB)':>15}")
+                for stage, st in stages.items():
+                    rps = f"{st['rows_per_s']:.0f}" if st["rows_per_s"] else "-"
+                    print(f"  {stage:<17}{st['seconds']:>9.3f}{rps:>13}{st['peak_rss_mb']:>15.1f}")
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_rev": _git_rev(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sizes": sizes, "pii_rate": args.pii_rate, "words": [wmin, wmax], "chunk_size": args.chunk_size,
+            "model": args.model,
+        },
+        "results": results,
+    }
+    Path(args.json_out).parent.mkdir(parents=True, exist_ok=True)
+    Path(args.json_out).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"\nOK: resultados salvos em {args.json_out}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print("REGRESSÕES:")
+            for r in regressions:
+                print("  -", r)
+            return 1
+        print(f"sem regressões em relação a {args.compare} (tolerância {args.tolerance:.0%})")
+    return 0
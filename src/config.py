@@ -15,6 +15,7 @@ class Paths:
 @dataclass(frozen=True)
 class Defaults:
     seed: int = 42
+    chunk_size: int = 50_000
     text_column_candidates: tuple[str, ...] = (
         "texto mascarado",
         "texto",
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import atexit
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Sequence
+
+from .regex_features import SIGNAL_KEYS, scan_signals, scan_spans
+
+_POOLS: Dict[int, ProcessPoolExecutor] = {}
+
+
+def resolve_workers(workers: int | None) -> int:
+    """0/None = todos os núcleos disponíveis."""
+    if not workers or workers < 0:
+        return os.cpu_count() or 1
+    return int(workers)
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    # o pool é reaproveitado entre chamadas (ex.: modo --chunk-size chama uma vez por lote)
+    pool = _POOLS.get(workers)
+    if pool is None:
+        pool = _POOLS[workers] = ProcessPoolExecutor(max_workers=workers)
+    return pool
+
+
+@atexit.register
+def _shutdown_pools() -> None:
+    for pool in _POOLS.values():
+        pool.shutdown(cancel_futures=True)
+    _POOLS.clear()
+
+
+def _scan_chunk(texts: Sequence[str]) -> List[tuple]:
+    return [scan_signals(t) for t in texts]
+
+
+def _spans_chunk(texts: Sequence[str]) -> List[tuple]:
+    return [scan_spans(t) for t in texts]
+
+
+def _map_chunks(fn: Callable[[Sequence[str]], list], texts: Sequence[str], workers: int, chunk_size: int) -> list:
+    workers = resolve_workers(workers)
+    if workers == 1 or len(texts) <= chunk_size:
+        return fn(texts)
+    chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+    out: list = []
+    for part in _get_pool(workers).map(fn, chunks):
+        out.extend(part)
+    return out
+
+
+def batch_scan_signals(texts: Sequence[str], workers: int = 1, chunk_size: int = 2000) -> List[tuple]:
+    """scan_signals em lote; com workers > 1 distribui pedaços entre processos.
+
+    O resultado segue a ordem de entrada e é idêntico ao caminho de um núcleo.
+    """
+    return _map_chunks(_scan_chunk, texts, workers, chunk_size)
+
+
+def batch_scan_spans(texts: Sequence[str], workers: int = 1, chunk_size: int = 2000) -> List[tuple]:
+    """scan_spans em lote: [(sinais, trechos), ...] na ordem de entrada."""
+    return _map_chunks(_spans_chunk, texts, workers, chunk_size)
+
+
+def batch_regex_signals(texts: Sequence[str], workers: int = 1, chunk_size: int = 2000) -> List[Dict[str, Any]]:
+    """Equivalente a [regex_signals(t) for t in texts], opcionalmente em vários processos."""
+    return [dict(zip(SIGNAL_KEYS, v)) for v in batch_scan_signals(texts, workers, chunk_size)]
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from typing import List, Mapping, Sequence, Tuple
+
+import numpy as np
+
+from .batch import batch_scan_signals, batch_scan_spans
+from .regex_features import REGEX_FEATURE_COLS, REGEX_SCORE_WEIGHTS, SIGNAL_KEYS, Span
+
+_SIGNAL_INDEX = {k: i for i, k in enumerate(SIGNAL_KEYS)}
+
+
+def signal_matrix(texts: Sequence[str], workers: int = 1) -> np.ndarray:
+    """Matriz (n, len(SIGNAL_KEYS)) com os sinais de regex (has_* como 0/1)."""
+    rows = batch_scan_signals(texts, workers=workers)
+    return np.array(rows, dtype=float).reshape(len(texts), len(SIGNAL_KEYS))
+
+
+def signal_matrix_with_spans(texts: Sequence[str], workers: int = 1) -> Tuple[np.ndarray, List[List[Span]]]:
+    """signal_matrix e os trechos de cada texto, na mesma varredura (modo --redact)."""
+    rows = batch_scan_spans(texts, workers=workers)
+    S = np.array([r[0] for r in rows], dtype=float).reshape(len(texts), len(SIGNAL_KEYS))
+    return S, [r[1] for r in rows]
+
+
+def scores_from_signals(S: np.ndarray) -> np.ndarray:
+    """regex_score vetorizado; soma na mesma ordem do escalar, logo com o mesmo resultado bit a bit."""
+    score = np.zeros(S.shape[0], dtype=float)
+    for key, weight in REGEX_SCORE_WEIGHTS:
+        score += weight * S[:, _SIGNAL_INDEX[key]]
+    return np.minimum(score, 1.0)
+
+
+def features_from_signals(
+    S: np.ndarray,
+    cols: Sequence[str] = REGEX_FEATURE_COLS,
+    extra: Mapping[str, Sequence[float]] | None = None,
+) -> np.ndarray:
+    """Seleciona as colunas do modelo na ordem de `cols`.
+
+    Colunas que não saem do texto (ex.: injected_count) vêm de `extra` quando
+    informadas (treino) e ficam 0 caso contrário (inferência em dados reais).
+    """
+    n = S.shape[0]
+    X = np.zeros((n, len(cols)), dtype=float)
+    for j, c in enumerate(cols):
+        if extra is not None and c in extra:
+            X[:, j] = np.asarray(extra[c], dtype=float)
+        elif c in _SIGNAL_INDEX:
+            X[:, j] = S[:, _SIGNAL_INDEX[c]]
+    return X
+
+
+def regex_feature_matrix(
+    texts: Sequence[str],
+    cols: Sequence[str] = REGEX_FEATURE_COLS,
+    extra: Mapping[str, Sequence[float]] | None = None,
+    workers: int = 1,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Features numéricas (n, len(cols)) e vetor regex_score de um lote de textos.
+
+    Caminho único usado pelo treino e pela inferência do modelo híbrido.
+    """
+    S = signal_matrix(texts, workers=workers)
+    return features_from_signals(S, cols, extra), scores_from_signals(S)
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import functools
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+# Detector de nomes por gazetteer: um primeiro nome conhecido seguido de um ou mais
+# nomes/sobrenomes conhecidos ("Maria Silva", "João Carlos de Souza"). Substitui a
+# heurística de duas palavras capitalizadas, que disparava em "Secretaria Saúde",
+# "Distrito Federal" etc.
+#
+# O gazetteer é compilado uma vez numa trie e a trie é serializada como um único padrão
+# do `re` ("Ma(?:r(?:ia(?:na)?|cos)|...)"): o motor em C percorre a trie a partir de
+# cada inicial candidata, com trabalho limitado pela maior entrada e não pelo tamanho
+# do dicionário. Um autômato percorrido em Python puro seria mais lento que o regex
+# que ele substitui.
+
+GAZETTEER_PATH = Path(__file__).with_name("names_br.txt")
+
+# Partículas aceitas entre os nomes ("Maria da Silva", "Antônio dos Santos").
+PARTICLES: Tuple[str, ...] = ("da", "das", "de", "do", "dos")
+
+
+def load_gazetteer(path: Path = GAZETTEER_PATH) -> Dict[str, List[str]]:
+    """Seções do arquivo ("primeiros", "sobrenomes") -> entradas."""
+    sections: Dict[str, List[str]] = {}
+    current: List[str] | None = None
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        if line.startswith("[") and line.endswith("]"):
+            current = sections.setdefault(line[1:-1].strip(), [])
+        elif current is not None:
+            current.append(line)
+    return sections
+
+
+def _trie(words: Iterable[str]) -> dict:
+    root: dict = {}
+    for w in words:
+        node = root
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = {}  # fim de entrada
+    return root
+
+
+def _trie_pattern(node: dict) -> str:
+    # ramos em ordem fixa; o "?" guloso tenta primeiro a entrada mais longa e o \b do
+    # chamador força o casamento da palavra inteira ("Mariana" não para em "Maria")
+    alts = [re.escape(ch) + _trie_pattern(child) for ch, child in sorted(node.items()) if ch]
+    if not alts:
+        return ""
+    body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+    if "" in node:
+        return f"(?:{body})?"
+    return body
+
+
+def compile_pattern(first_names: Iterable[str], other_names: Iterable[str]) -> str:
+    """Padrão de um nome completo: primeiro nome, depois (partícula?) nome/sobrenome, 1+ vezes.
+
+    Cada ramo da raiz começa pela inicial literal seguida de (?<!\\w<inicial>), como os
+    padrões de regex_features: o `re` pula direto para as iniciais possíveis.
+    """
+    first = _trie(first_names)
+    branches = [
+        f"{re.escape(ch)}(?<!\\w{re.escape(ch)}){_trie_pattern(child)}" for ch, child in sorted(first.items())
+    ]
+    any_name = _trie_pattern(_trie(set(first_names) | set(other_names)))
+    particle = "(?:" + "|".join(PARTICLES) + r")\s+"
+    return rf"(?:{'|'.join(branches)})\b(?:\s+(?:{particle})?{any_name}\b)+"
+
+
+@functools.lru_cache(maxsize=None)
+def name_pattern() -> re.Pattern:
+    """Padrão compilado do gazetteer padrão (carregado só no primeiro uso, uma vez por processo)."""
+    gaz = load_gazetteer()
+    return re.compile(compile_pattern(gaz.get("primeiros", []), gaz.get("sobrenomes", [])))
+
+
+def find_names(text: str) -> List[Tuple[int, int]]:
+    """Trechos (início, fim) dos nomes encontrados, sem sobreposição."""
+    return [m.span() for m in name_pattern().finditer(text)]
@@ -1,34 +1,164 @@
 from __future__ import annotations
 
 import re
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, List, Tuple
 
+from .names import name_pattern
+
+# Padrões que começariam com "\b<classe>" são escritos como "<classe>(?<!\w<classe>)":
+# a semântica é idêntica (os caracteres da classe são \w), mas o motor do `re`
+# passa a pular direto para os candidatos em vez de testar \b em toda posição.
 RE_EMAIL = re.compile(r"[A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,}", re.IGNORECASE)
-RE_CPF = re.compile(r"\b\d{3}\.?\d{3}\.?\d{3}-?\d{2}\b")
+RE_CPF = re.compile(r"\d(?<!\w\d)\d{2}\.?\d{3}\.?\d{3}-?\d{2}\b")
 RE_PHONE = re.compile(r"\b(?:\+?55\s*)?(?:\(?\d{2}\)?\s*)?(?:9\d{4}|\d{4})-?\d{4}\b")
-RE_RG = re.compile(r"\b\d{1,2}\.?\d{3}\.?\d{3}-?[0-9Xx]\b")
-RE_ZIP = re.compile(r"\b\d{5}-?\d{3}\b")
-RE_NAME = re.compile(r"\b[A-ZÁÀÂÃÉÈÊÍÌÎÓÒÔÕÚÙÛÇ][a-záàâãéèêíìîóòôõúùûç]+\s+[A-ZÁÀÂÃÉÈÊÍÌÎÓÒÔÕÚÙÛÇ][a-záàâãéèêíìîóòôõúùûç]+\b")
+RE_RG = re.compile(r"\d(?<!\w\d)\d?\.?\d{3}\.?\d{3}-?[0-9Xx]\b")
+RE_ZIP = re.compile(r"\d(?<!\w\d)\d{4}-?\d{3}\b")
+# Nomes: padrão compilado do gazetteer em names.py (has_name_like / name_count).
+
+# Versão dos padrões/pesos: entra na fingerprint do cache de scores (mude ao alterar regras).
+REGEX_VERSION = "2"
+
+# Todos os padrões numéricos exigem um dígito e o de e-mail exige "@".
+_RE_DIGIT = re.compile(r"\d")
+
+SIGNAL_KEYS: Tuple[str, ...] = (
+    "has_email",
+    "has_cpf",
+    "has_phone",
+    "has_rg",
+    "has_zip",
+    "has_name_like",
+    "email_count",
+    "cpf_count",
+    "phone_count",
+    "name_count",
+)
+
+# Colunas numéricas do modelo híbrido (a ordem faz parte do contrato do bundle).
+REGEX_FEATURE_COLS = [
+    "has_cpf",
+    "has_email",
+    "has_phone",
+    "has_rg",
+    "has_zip",
+    "injected_count",
+]
+
+# Trecho detectado: (tipo, início, fim), com fim exclusivo como em str[início:fim].
+Span = Tuple[str, int, int]
+
+# Tipos mascarados por padrão no --redact (nomes ficam de fora: o gazetteer só cobre nomes comuns).
+REDACT_TYPES: Tuple[str, ...] = ("cpf", "email", "phone", "rg", "zip")
+
+# Pesos do regex_score, somados nesta ordem.
+REGEX_SCORE_WEIGHTS: Tuple[Tuple[str, float], ...] = (
+    ("has_cpf", 0.45),
+    ("has_email", 0.35),
+    ("has_phone", 0.25),
+    ("has_rg", 0.20),
+    ("has_zip", 0.10),
+    ("has_name_like", 0.05),
+)
+
+
+def scan_signals(text: str) -> tuple:
+    """Varredura única do texto; devolve os valores na ordem de SIGNAL_KEYS.
+
+    Cada padrão roda no máximo uma vez (as contagens dão também o has_*), e os
+    padrões cujo caractere-gatilho não aparece no texto nem chegam a rodar.
+    """
+    email_count = len(RE_EMAIL.findall(text)) if "@" in text else 0
+    if _RE_DIGIT.search(text) is not None:
+        cpf_count = len(RE_CPF.findall(text))
+        phone_count = len(RE_PHONE.findall(text))
+        has_rg = RE_RG.search(text) is not None
+        has_zip = RE_ZIP.search(text) is not None
+    else:
+        cpf_count = phone_count = 0
+        has_rg = has_zip = False
+    name_count = len(name_pattern().findall(text))
+    return (
+        email_count > 0,
+        cpf_count > 0,
+        phone_count > 0,
+        has_rg,
+        has_zip,
+        name_count > 0,
+        email_count,
+        cpf_count,
+        phone_count,
+        name_count,
+    )
+
+
+def scan_spans(text: str) -> Tuple[tuple, List[Span]]:
+    """Como scan_signals, mas numa passada de finditer que também devolve os trechos.
+
+    Os sinais saem das próprias correspondências (mesmos padrões e gatilhos), então
+    são idênticos aos de scan_signals; os trechos vêm ordenados por início.
+    """
+    spans: List[Span] = []
+    if "@" in text:
+        spans += [("email", m.start(), m.end()) for m in RE_EMAIL.finditer(text)]
+    email_count = len(spans)
+    cpf_count = phone_count = 0
+    has_rg = has_zip = False
+    if _RE_DIGIT.search(text) is not None:
+        for kind, pattern in (("cpf", RE_CPF), ("phone", RE_PHONE), ("rg", RE_RG), ("zip", RE_ZIP)):
+            found = [(kind, m.start(), m.end()) for m in pattern.finditer(text)]
+            spans += found
+            if kind == "cpf":
+                cpf_count = len(found)
+            elif kind == "phone":
+                phone_count = len(found)
+            elif kind == "rg":
+                has_rg = bool(found)
+            else:
+                has_zip = bool(found)
+    names = [("name", m.start(), m.end()) for m in name_pattern().finditer(text)]
+    spans += names
+    spans.sort(key=lambda s: (s[1], -s[2]))
+    signals = (
+        email_count > 0,
+        cpf_count > 0,
+        phone_count > 0,
+        has_rg,
+        has_zip,
+        bool(names),
+        email_count,
+        cpf_count,
+        phone_count,
+        len(names),
+    )
+    return signals, spans
+
+
+def redact(text: str, spans: Iterable[Span], types: Iterable[str] = REDACT_TYPES) -> str:
+    """Substitui os trechos dos tipos pedidos por [TIPO]; trechos sobrepostos viram um só."""
+    types = set(types)
+    parts: List[str] = []
+    pos = 0
+    for kind, start, end in spans:
+        if kind not in types:
+            continue
+        if start < pos:  # sobreposto ao trecho anterior: estende a máscara
+            if end > pos:
+                pos = end
+            continue
+        parts.append(text[pos:start])
+        parts.append(f"[{kind.upper()}]")
+        pos = end
+    if not parts:
+        return text
+    parts.append(text[pos:])
+    return "".join(parts)
+
 
 def regex_signals(text: str) -> Dict[str, Any]:
-    return {
-        "has_email": bool(RE_EMAIL.search(text)),
-        "has_cpf": bool(RE_CPF.search(text)),
-        "has_phone": bool(RE_PHONE.search(text)),
-        "has_rg": bool(RE_RG.search(text)),
-        "has_zip": bool(RE_ZIP.search(text)),
-        "has_name_like": bool(RE_NAME.search(text)),
-        "email_count": len(RE_EMAIL.findall(text)),
-        "cpf_count": len(RE_CPF.findall(text)),
-        "phone_count": len(RE_PHONE.findall(text)),
-    }
+    return dict(zip(SIGNAL_KEYS, scan_signals(text)))
 
 def regex_score(signals: Dict[str, Any]) -> float:
     score = 0.0
-    if signals.get("has_cpf"): score += 0.45
-    if signals.get("has_email"): score += 0.35
-    if signals.get("has_phone"): score += 0.25
-    if signals.get("has_rg"): score += 0.20
-    if signals.get("has_zip"): score += 0.10
-    if signals.get("has_name_like"): score += 0.05
+    for key, weight in REGEX_SCORE_WEIGHTS:
+        if signals.get(key): score += weight
     return min(score, 1.0)
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+import pandas as pd
+
+# Formatos colunares (pyarrow é opcional e só é importado quando um deles aparece).
+PARQUET_SUFFIXES = (".parquet",)
+ARROW_SUFFIXES = (".arrow", ".feather")
+COLUMNAR_SUFFIXES = PARQUET_SUFFIXES + ARROW_SUFFIXES
+
+# Tipos das colunas conhecidas na saída colunar (o CSV continua como antes).
+COLUMN_TYPES = {
+    "pred_label": "int8",
+    "label": "int8",
+    "injected_count": "int8",
+    "pred_score": "float32",
+    "ml_score": "float32",
+    "regex_score": "float32",
+    "has_cpf": "bool",
+    "has_email": "bool",
+    "has_phone": "bool",
+    "has_rg": "bool",
+    "has_zip": "bool",
+    "forced_by_regex": "bool",
+}
+
+
+def is_columnar(path: Path) -> bool:
+    return Path(path).suffix.lower() in COLUMNAR_SUFFIXES
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+    except ImportError as e:
+        raise ImportError("Arquivos .parquet/.arrow exigem o pacote pyarrow (pip install pyarrow).") from e
+    return pa
+
+
+def schema_names(path: Path) -> List[str]:
+    """Nomes das colunas, lidos só dos metadados (sem carregar dados)."""
+    pa = _pyarrow()
+    path = Path(path)
+    if path.suffix.lower() in PARQUET_SUFFIXES:
+        import pyarrow.parquet as pq
+
+        return list(pq.read_schema(path).names)
+    with pa.memory_map(str(path)) as src:
+        return list(pa.ipc.open_file(src).schema.names)
+
+
+def iter_columnar_frames(
+    path: Path, chunk_size: Optional[int], columns: Optional[List[str]] = None
+) -> Iterator[pd.DataFrame]:
+    """Lê .parquet (por row groups, em lotes) ou Arrow IPC (mmap), só com `columns`."""
+    pa = _pyarrow()
+    path = Path(path)
+    if path.suffix.lower() in PARQUET_SUFFIXES:
+        import pyarrow.parquet as pq
+
+        if not chunk_size:
+            yield pq.read_table(path, columns=columns).to_pandas()
+            return
+        pf = pq.ParquetFile(path)
+        if pf.metadata.num_rows == 0:
+            yield pf.schema_arrow.empty_table().to_pandas()
+            return
+        for batch in pf.iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+        return
+
+    with pa.memory_map(str(path)) as src:
+        table = pa.ipc.open_file(src).read_all()
+        if columns is not None:
+            table = table.select(columns)
+        if not chunk_size:
+            yield table.to_pandas()
+            return
+        for batch in table.to_batches(max_chunksize=chunk_size):
+            yield batch.to_pandas()
+
+
+def to_arrow_table(df: pd.DataFrame, schema=None):
+    """DataFrame -> pa.Table com os tipos de COLUMN_TYPES (`schema` fixa o esquema dos lotes seguintes)."""
+    pa = _pyarrow()
+    types = {c: t for c, t in COLUMN_TYPES.items() if c in df.columns}
+    if types:
+        df = df.astype(types)
+    return pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+
+
+class ColumnarWriter:
+    """Grava lotes sucessivos num único .parquet / .arrow (o esquema vem do primeiro lote)."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._writer = None
+        self._schema = None
+
+    def write(self, df: pd.DataFrame) -> None:
+        pa = _pyarrow()
+        table = to_arrow_table(df, self._schema)
+        if self._writer is None:
+            self._schema = table.schema
+            if self.path.suffix.lower() in PARQUET_SUFFIXES:
+                import pyarrow.parquet as pq
+
+                self._writer = pq.ParquetWriter(self.path, self._schema)
+            else:
+                self._writer = pa.ipc.new_file(str(self.path), self._schema)
+        self._writer.write_table(table)
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
@@ -2,12 +2,15 @@ from __future__ import annotations
 
 import json
 from pathlib import Path
-from typing import List
+from typing import Iterator, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
 from ..config import Defaults
-from .schemas import Record
+from .columnar import is_columnar, iter_columnar_frames, schema_names
+from .schemas import Record, RecordBatch
+from .xlsx import cache_path, is_xlsx, iter_xlsx_frames, sniff_header, write_cache
 
 
 def _normalize_col(col: str) -> str:
@@ -22,48 +25,225 @@ def _pick_column(columns: list[str], candidates: tuple[str, ...]) -> str | None:
     return None
 
 
-def load_records(path: Path) -> List[Record]:
-    """Loads records from .xlsx, .csv or .jsonl with auto-detect."""
+def _iter_jsonl_frames(
+    path: Path, chunk_size: Optional[int], columns: Optional[List[str]] = None
+) -> Iterator[pd.DataFrame]:
+    if columns is not None:
+        yield from _iter_jsonl_projected(path, chunk_size, columns)
+        return
+    rows = []
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            rows.append(json.loads(line))
+            if chunk_size and len(rows) >= chunk_size:
+                yield pd.DataFrame(rows)
+                rows = []
+    if rows or not chunk_size:
+        yield pd.DataFrame(rows)
+
+
+def _iter_jsonl_projected(path: Path, chunk_size: Optional[int], columns: List[str]) -> Iterator[pd.DataFrame]:
+    """Como _iter_jsonl_frames, mas guarda só as chaves `columns` de cada objeto.
+
+    Nenhum DataFrame largo é montado: cada coluna é uma lista, e chave ausente vira
+    NaN, como em pd.DataFrame(lista_de_dicts).
+    """
+    values: List[list] = [[] for _ in columns]
+    n = 0
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            obj = json.loads(line)
+            for col, key in zip(values, columns):
+                col.append(obj.get(key, np.nan))
+            n += 1
+            if chunk_size and n >= chunk_size:
+                yield pd.DataFrame(dict(zip(columns, values)), columns=columns)
+                values = [[] for _ in columns]
+                n = 0
+    if n or not chunk_size:
+        yield pd.DataFrame(dict(zip(columns, values)), columns=columns)
+
+
+def _iter_frames(
+    path: Path,
+    chunk_size: Optional[int],
+    columns: Optional[List[str]] = None,
+    dtype: Optional[dict] = None,
+) -> Iterator[pd.DataFrame]:
+    """Lê o arquivo em DataFrames de até chunk_size linhas (None = arquivo inteiro).
+
+    `columns` projeta a leitura (só o .xls lê todas as colunas); `dtype` vale para o CSV.
+    """
     suffix = path.suffix.lower()
 
-    if suffix in (".xlsx", ".xls"):
-        df = pd.read_excel(path)
+    if is_columnar(path):
+        yield from iter_columnar_frames(path, chunk_size, columns)
+    elif is_xlsx(path):
+        yield from iter_xlsx_frames(path, chunk_size, columns)
+    elif suffix == ".xls":
+        yield pd.read_excel(path)
     elif suffix == ".csv":
-        df = pd.read_csv(path)
+        if chunk_size:
+            yield from pd.read_csv(path, chunksize=chunk_size, usecols=columns, dtype=dtype)
+        else:
+            yield pd.read_csv(path, usecols=columns, dtype=dtype)
     elif suffix == ".jsonl":
-        rows = []
-        with path.open("r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                rows.append(json.loads(line))
-        df = pd.DataFrame(rows)
+        yield from _iter_jsonl_frames(path, chunk_size, columns)
     else:
-        raise ValueError(f"Formato não suportado: {suffix}. Use .xlsx, .csv ou .jsonl")
+        raise ValueError(f"Formato não suportado: {suffix}. Use .xlsx, .csv, .jsonl, .parquet ou .arrow")
 
-    if df.empty:
-        return []
 
-    cols = list(df.columns)
+def _detect_columns(cols: List[str]) -> Tuple[str | None, str]:
     id_col = _pick_column(cols, Defaults.id_column_candidates)
     text_col = _pick_column(cols, Defaults.text_column_candidates)
-
     if text_col is None:
         raise ValueError(
             "Não foi possível detectar a coluna de texto automaticamente. "
             f"Colunas encontradas: {cols}. "
             "Dica: renomeie para 'texto'/'mensagem' ou 'Texto Mascarado'."
         )
+    return id_col, text_col
+
+
+# Linhas do .jsonl lidas para descobrir as colunas (união das chaves, como o pd.DataFrame).
+JSONL_SCHEMA_SAMPLE = 1000
+
+
+def _jsonl_keys(path: Path, limit: Optional[int] = None) -> Tuple[List[str], bool]:
+    """União das chaves das primeiras `limit` linhas (None = todas), na ordem em que aparecem.
+
+    Devolve também se o arquivo foi lido até o fim.
+    """
+    keys: dict = {}
+    n = 0
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            if limit is not None and n >= limit:
+                return list(keys), False
+            keys.update(dict.fromkeys(json.loads(line)))
+            n += 1
+    return list(keys), True
+
+
+def table_columns(path: Path) -> List[str]:
+    """Colunas de uma tabela lendo só o cabeçalho/esquema.
+
+    No .jsonl, a união das chaves de uma amostra de linhas; se nela faltar candidata a
+    id ou a texto, o arquivo é varrido inteiro (a chave pode só aparecer mais adiante).
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if is_columnar(path):
+        return schema_names(path)
+    if is_xlsx(path):
+        return sniff_header(path)
+    if suffix == ".csv":
+        return list(pd.read_csv(path, nrows=0).columns)
+    if suffix == ".jsonl":
+        keys, complete = _jsonl_keys(path, JSONL_SCHEMA_SAMPLE)
+        if not complete and (_pick_column(keys, Defaults.id_column_candidates) is None
+                             or _pick_column(keys, Defaults.text_column_candidates) is None):
+            keys, _ = _jsonl_keys(path)
+        return keys
+    return list(next(_iter_frames(path, 1)).columns)
+
+
+def read_frame(path: Path, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Lê uma tabela (.csv/.jsonl/.xlsx/.parquet/.arrow) inteira, opcionalmente só `columns`."""
+    return next(iter_frames(path, None, columns))
+
 
-    if id_col is None:
-        df = df.reset_index(drop=True)
-        df["__id__"] = df.index.astype(str)
-        id_col = "__id__"
-
-    out: List[Record] = []
-    for _, row in df.iterrows():
-        rid = str(row[id_col])
-        text = "" if pd.isna(row[text_col]) else str(row[text_col])
-        out.append(Record(id=rid, text=text))
-    return out
+def iter_frames(path: Path, chunk_size: Optional[int], columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+    """Lê uma tabela em DataFrames de até chunk_size linhas, opcionalmente só `columns`."""
+    path = Path(path)
+    for df in _iter_frames(path, chunk_size, columns):
+        yield df if columns is None or path.suffix.lower() != ".xls" else df[columns]
+
+
+def iter_record_batches(path: Path, chunk_size: Optional[int] = Defaults.chunk_size) -> Iterator[RecordBatch]:
+    """Streams RecordBatches of up to chunk_size rows (memory bounded by the chunk, not the file).
+
+    Columns are auto-detected from the header alone (CSV header row, keys of the JSONL
+    objects, .xlsx header row or columnar schema) and the file is then parsed projected onto the
+    id/text columns (CSV with the text column as str); .xls still detects on the first
+    chunk. The `__id__` fallback numbering continues across chunks, so ids match what
+    load_records would produce.
+    """
+    id_col: str | None = None
+    text_col: str | None = None
+    columns: Optional[List[str]] = None
+    dtype: Optional[dict] = None
+    offset = 0
+    path = Path(path)
+
+    if path.suffix.lower() != ".xls":
+        cols = table_columns(path)
+        if not cols:
+            return  # arquivo sem registros
+        id_col, text_col = _detect_columns(cols)
+        columns = [c for c in (id_col, text_col) if c is not None]
+        # o id segue a inferência do pandas (mesmos ids de antes, em saídas e checkpoints)
+        dtype = {text_col: str}
+
+    for df in _iter_frames(path, chunk_size, columns, dtype):
+        if df.empty:
+            continue
+
+        if text_col is None:
+            id_col, text_col = _detect_columns(list(df.columns))
+
+        n = len(df)
+        if id_col is None:
+            ids = [str(i) for i in range(offset, offset + n)]
+        else:
+            ids = [str(v) for v in df[id_col].tolist()]
+        texts = df[text_col].tolist() if text_col in df.columns else [None] * n
+        offset += n
+
+        yield RecordBatch(ids, ["" if pd.isna(t) else str(t) for t in texts])
+
+
+def cached_input(path: Path, chunk_size: int = Defaults.chunk_size) -> Path:
+    """Para .xlsx, devolve uma cópia .arrow (só id/texto, já como texto) guardada ao lado da planilha.
+
+    A cópia é refeita quando o tamanho ou o mtime da planilha mudam; lê-la dá os mesmos
+    registros que ler a planilha. Outros formatos voltam sem mudança.
+    """
+    path = Path(path)
+    if not is_xlsx(path):
+        return path
+    cached = cache_path(path)
+    if cached.exists():
+        return cached
+    id_col, text_col = _detect_columns(sniff_header(path))
+
+    def frames() -> Iterator[pd.DataFrame]:
+        for batch in iter_record_batches(path, chunk_size):
+            cols = {text_col: batch.texts} if id_col is None else {id_col: batch.ids, text_col: batch.texts}
+            yield pd.DataFrame(cols)
+
+    return write_cache(path, frames())
+
+
+def iter_records(path: Path, chunk_size: Optional[int] = Defaults.chunk_size) -> Iterator[Record]:
+    """Streams records one by one (see iter_record_batches)."""
+    for batch in iter_record_batches(path, chunk_size):
+        yield from batch
+
+
+def load_batch(path: Path) -> RecordBatch:
+    """Loads the whole file as a single RecordBatch (.xlsx, .csv, .jsonl, .parquet or .arrow)."""
+    batches = list(iter_record_batches(path, chunk_size=None))
+    return batches[0] if len(batches) == 1 else RecordBatch.concat(batches)
+
+
+def load_records(path: Path) -> List[Record]:
+    """Loads records from .xlsx, .csv, .jsonl, .parquet or .arrow with auto-detect."""
+    return list(load_batch(path))
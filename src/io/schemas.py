@@ -1,16 +1,45 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Optional, Dict, Any
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, Iterable, Iterator, List, Sequence
 
-@dataclass
+@dataclass(slots=True)
 class Record:
     id: str
     text: str
 
-@dataclass
+@dataclass(slots=True)
 class Prediction:
     id: str
     pred_label: int
     pred_score: float
     signals: Optional[Dict[str, Any]] = None
+
+@dataclass(slots=True)
+class RecordBatch:
+    """Lote colunar de registros: ids e textos em listas paralelas (sem um objeto por linha).
+
+    Iterar produz Records sob demanda, para quem ainda trabalha registro a registro.
+    """
+    ids: List[str] = field(default_factory=list)
+    texts: List[str] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __iter__(self) -> Iterator[Record]:
+        return map(Record, self.ids, self.texts)
+
+    def take(self, indices: Sequence[int]) -> "RecordBatch":
+        return RecordBatch([self.ids[i] for i in indices], [self.texts[i] for i in indices])
+
+    def extend(self, other: "RecordBatch") -> None:
+        self.ids += other.ids
+        self.texts += other.texts
+
+    @classmethod
+    def concat(cls, batches: Iterable["RecordBatch"]) -> "RecordBatch":
+        out = cls()
+        for b in batches:
+            out.extend(b)
+        return out
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pandas as pd
+
+from .columnar import ColumnarWriter, is_columnar
+
+
+def write_frame(df: pd.DataFrame, path: Path) -> None:
+    """Grava a saída pelo sufixo: .csv (texto) ou .parquet/.arrow/.feather (tipado)."""
+    path = Path(path)
+    if is_columnar(path):
+        writer = ColumnarWriter(path)
+        try:
+            writer.write(df)
+        finally:
+            writer.close()
+    else:
+        df.to_csv(path, index=False, encoding="utf-8")
+
+
+class FrameWriter:
+    """Saída em lotes: o CSV recebe o cabeçalho só no primeiro lote; colunar vira um arquivo só."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._columnar = ColumnarWriter(self.path) if is_columnar(self.path) else None
+        self._header = True
+
+    def write(self, df: pd.DataFrame) -> None:
+        if self._columnar is not None:
+            self._columnar.write(df)
+            return
+        with self.path.open("w" if self._header else "a", encoding="utf-8", newline="") as f:
+            df.to_csv(f, index=False, header=self._header)
+        self._header = False
+
+    def close(self) -> None:
+        if self._columnar is not None:
+            self._columnar.close()
+
+    def __enter__(self) -> "FrameWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+
+import pandas as pd
+
+from .columnar import ColumnarWriter
+
+# Leitura de .xlsx em streaming (openpyxl read-only): só a primeira planilha, linha a
+# linha, e só as colunas pedidas. pd.read_excel fica para .xls.
+XLSX_SUFFIXES = (".xlsx",)
+
+# Cópia convertida guardada ao lado da planilha: .<nome>.<tamanho>-<mtime_ns>.arrow
+CACHE_SUFFIX = ".arrow"
+
+
+def is_xlsx(path: Path) -> bool:
+    return Path(path).suffix.lower() in XLSX_SUFFIXES
+
+
+def _xlsx_value(v):
+    # mesma conversão do pd.read_excel: números inteiros viram int
+    if isinstance(v, float) and v.is_integer():
+        return int(v)
+    return v
+
+
+def _blank(row: tuple) -> bool:
+    return all(v is None or v == "" for v in row)
+
+
+def _header(row: tuple) -> List[str]:
+    """Nomes como o pd.read_excel: célula vazia vira "Unnamed: i", repetidos ganham ".1", ".2"..."""
+    names: List[str] = []
+    seen: dict = {}
+    for i, v in enumerate(row):
+        name = f"Unnamed: {i}" if v is None else str(v)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        seen.setdefault(name, 0)
+        names.append(name)
+    return names
+
+
+def _sheet_rows(path: Path) -> Iterator[tuple]:
+    """Linhas da primeira planilha como o pd.read_excel as vê.
+
+    Linhas em branco no meio viram registros vazios (NaN no pandas); as do final são
+    descartadas. Por isso uma linha em branco só sai quando aparece outra depois dela.
+    """
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        blank: List[tuple] = []
+        for row in wb.worksheets[0].iter_rows(values_only=True):
+            if _blank(row):
+                blank.append(row)
+                continue
+            yield from blank
+            blank.clear()
+            yield row
+    finally:
+        wb.close()
+
+
+def sniff_header(path: Path) -> List[str]:
+    """Cabeçalho (primeira linha, como no pd.read_excel) sem ler o resto da planilha."""
+    rows = _sheet_rows(Path(path))
+    try:
+        return _header(next(rows, ()))
+    finally:
+        rows.close()
+
+
+def iter_xlsx_frames(
+    path: Path, chunk_size: Optional[int], columns: Optional[List[str]] = None
+) -> Iterator[pd.DataFrame]:
+    """DataFrames de até chunk_size linhas (None = planilha inteira), só com `columns`.
+
+    Nada além do lote corrente fica em memória; as demais células são descartadas
+    assim que a linha é lida.
+    """
+    rows = _sheet_rows(Path(path))
+    try:
+        first = next(rows, None)
+        if first is None:
+            yield pd.DataFrame(columns=columns or [])
+            return
+        header = _header(first)
+        names = header if columns is None else list(columns)
+        idx = [header.index(c) for c in names]
+        batch = []
+        for row in rows:
+            batch.append([_xlsx_value(row[i]) if i < len(row) else None for i in idx])
+            if chunk_size and len(batch) >= chunk_size:
+                yield pd.DataFrame(batch, columns=names)
+                batch = []
+        yield pd.DataFrame(batch, columns=names)
+    finally:
+        rows.close()
+
+
+def cache_path(path: Path) -> Path:
+    """Onde fica a cópia convertida desta versão da planilha (chave: tamanho + mtime)."""
+    path = Path(path)
+    st = path.stat()
+    return path.with_name(f".{path.name}.{st.st_size}-{st.st_mtime_ns}{CACHE_SUFFIX}")
+
+
+def write_cache(path: Path, frames: Iterable[pd.DataFrame]) -> Path:
+    """Grava `frames` como a cópia convertida de `path` e apaga cópias de versões antigas."""
+    path = Path(path)
+    target = cache_path(path)
+    tmp = target.with_name(target.name + f".tmp{os.getpid()}")
+    writer = ColumnarWriter(tmp)
+    try:
+        for df in frames:
+            writer.write(df)
+    finally:
+        writer.close()
+    if not tmp.exists():  # planilha sem linhas: nada a guardar
+        return path
+    os.replace(tmp, target)
+    for old in path.parent.glob(f".{path.name}.*{CACHE_SUFFIX}"):
+        if old != target:
+            old.unlink(missing_ok=True)
+    return target
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import time
+from pathlib import Path
+from typing import List, Sequence
+
+import numpy as np
+
+# Artefato compilado do modelo híbrido (TF-IDF + LogisticRegression são lineares):
+#   meta.json      intercepto, pesos das colunas regex e parâmetros do tokenizador
+#   vocab.txt      um termo por linha, na ordem das colunas do TF-IDF
+#   weights.npy    idf * coef por termo
+#   idf.npy        idf por termo (necessário para a normalização L2)
+# Os .npy são abertos com mmap_mode="r": vários processos compartilham as páginas.
+FORMAT_VERSION = 1
+_BLOCK = 2048
+
+
+def _check_vectorizer(vec) -> None:
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    if not isinstance(vec, TfidfVectorizer):
+        raise ValueError(f"Exportação linear suporta apenas TfidfVectorizer (recebido {type(vec).__name__})")
+    unsupported = {
+        "analyzer": (vec.analyzer, "word"),
+        "tokenizer": (vec.tokenizer, None),
+        "preprocessor": (vec.preprocessor, None),
+        "strip_accents": (vec.strip_accents, None),
+        "stop_words": (vec.stop_words, None),
+        "binary": (vec.binary, False),
+        "norm": (vec.norm, "l2"),
+        "use_idf": (vec.use_idf, True),
+    }
+    bad = {k: v for k, (v, ok) in unsupported.items() if v != ok}
+    if bad:
+        raise ValueError(f"Parâmetros do TfidfVectorizer não suportados na exportação linear: {bad}")
+
+
+def export_linear(bundle: dict, out_dir: Path) -> Path:
+    """Exporta um bundle do train_hybrid para o formato compilado em `out_dir`."""
+    vec = bundle["vectorizer"]
+    clf = bundle["model"]
+    _check_vectorizer(vec)
+
+    coef = np.asarray(clf.coef_, dtype=float).ravel()
+    n_terms = len(vec.vocabulary_)
+    terms = [""] * n_terms
+    for term, j in vec.vocabulary_.items():
+        if "\n" in term:
+            raise ValueError(f"Termo com quebra de linha não pode ser exportado: {term!r}")
+        terms[j] = term
+    idf = np.asarray(vec.idf_, dtype=float)
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    (out_dir / "vocab.txt").write_text("\n".join(terms), encoding="utf-8")
+    np.save(out_dir / "weights.npy", idf * coef[:n_terms])
+    np.save(out_dir / "idf.npy", idf)
+    meta = {
+        "format_version": FORMAT_VERSION,
+        "intercept": float(np.asarray(clf.intercept_).ravel()[0]),
+        "regex_feature_cols": list(bundle["regex_feature_cols"]),
+        "regex_coef": coef[n_terms:].tolist(),
+        "token_pattern": vec.token_pattern,
+        "lowercase": bool(vec.lowercase),
+        "ngram_range": list(vec.ngram_range),
+        "sublinear_tf": bool(vec.sublinear_tf),
+    }
+    (out_dir / "meta.json").write_text(json.dumps(meta, indent=2, ensure_ascii=False), encoding="utf-8")
+    return out_dir
+
+
+def is_linear_artifact(path: Path) -> bool:
+    return Path(path).is_dir() and (Path(path) / "meta.json").exists()
+
+
+class LinearScorer:
+    """Calcula o ml_score direto dos tokens, sem matriz TF-IDF nem hstack."""
+
+    def __init__(self, path: Path):
+        path = Path(path)
+        meta = json.loads((path / "meta.json").read_text(encoding="utf-8"))
+        if meta.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Versão de artefato linear não suportada: {meta.get('format_version')}")
+        self.regex_feature_cols: List[str] = meta["regex_feature_cols"]
+        self.regex_coef = np.asarray(meta["regex_coef"], dtype=float)
+        self.intercept = float(meta["intercept"])
+        self.lowercase = meta["lowercase"]
+        self.sublinear_tf = meta["sublinear_tf"]
+        self.min_n, self.max_n = meta["ngram_range"]
+        self._token_re = re.compile(meta["token_pattern"])
+        self.weights = np.load(path / "weights.npy", mmap_mode="r")
+        self.idf = np.load(path / "idf.npy", mmap_mode="r")
+        with (path / "vocab.txt").open("r", encoding="utf-8") as f:
+            self.vocab = {term: j for j, term in enumerate(f.read().split("\n"))}
+
+    def _terms(self, text: str) -> List[str]:
+        # mesma análise do TfidfVectorizer (_word_ngrams)
+        tokens = self._token_re.findall(text.lower() if self.lowercase else text)
+        if self.max_n == 1:
+            return tokens
+        out = list(tokens) if self.min_n == 1 else []
+        for n in range(max(self.min_n, 2), min(self.max_n + 1, len(tokens) + 1)):
+            out.extend(" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        return out
+
+    def _text_part(self, texts: Sequence[str]) -> np.ndarray:
+        n = len(texts)
+        get = self.vocab.get
+        doc_ids: List[np.ndarray] = []
+        term_ids: List[np.ndarray] = []
+        for d, text in enumerate(texts):
+            idx = [j for j in map(get, self._terms(text)) if j is not None]
+            if idx:
+                term_ids.append(np.asarray(idx, dtype=np.int64))
+                doc_ids.append(np.full(len(idx), d, dtype=np.int64))
+
+        out = np.zeros(n, dtype=float)
+        if term_ids:
+            # tf por (documento, termo) do bloco inteiro de uma vez
+            n_vocab = len(self.vocab)
+            keys, tf = np.unique(np.concatenate(doc_ids) * n_vocab + np.concatenate(term_ids), return_counts=True)
+            docs, terms = np.divmod(keys, n_vocab)
+            tf = tf.astype(float)
+            if self.sublinear_tf:
+                tf = np.log(tf) + 1.0
+            sq_norm = np.bincount(docs, weights=(tf * self.idf[terms]) ** 2, minlength=n)
+            dot = np.bincount(docs, weights=tf * self.weights[terms], minlength=n)
+            norm = np.sqrt(sq_norm)
+            np.divide(dot, norm, out=out, where=norm > 0)
+        return out
+
+    def decision_function(self, texts: Sequence[str], X_num: np.ndarray) -> np.ndarray:
+        # blocos limitam os temporários (um int64 por token) independentemente do tamanho do lote
+        text_part = np.concatenate(
+            [self._text_part(texts[i:i + _BLOCK]) for i in range(0, len(texts), _BLOCK)]
+        ) if len(texts) else np.zeros(0, dtype=float)
+        return text_part + np.asarray(X_num, dtype=float) @ self.regex_coef + self.intercept
+
+    def predict_ml(self, texts: Sequence[str], X_num: np.ndarray) -> np.ndarray:
+        """Probabilidade da classe 1 (equivalente a predict_proba(X)[:, 1])."""
+        return 1.0 / (1.0 + np.exp(-self.decision_function(texts, X_num)))
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Exporta um bundle híbrido .joblib para o scorer linear compilado.")
+    ap.add_argument("--model", required=True, help="Modelo híbrido .joblib")
+    ap.add_argument("--out", required=True, help="Diretório do artefato linear")
+    ap.add_argument("--check", default=None, help="Entrada opcional (.xlsx/.csv/.jsonl) para conferir a equivalência com o sklearn")
+    ap.add_argument("--tol", type=float, default=1e-9)
+    args = ap.parse_args()
+
+    import joblib
+
+    t0 = time.perf_counter()
+    bundle = joblib.load(args.model)
+    t_joblib = time.perf_counter() - t0
+    export_linear(bundle, Path(args.out))
+    t0 = time.perf_counter()
+    scorer = LinearScorer(Path(args.out))
+    t_linear = time.perf_counter() - t0
+    print(f"OK: artefato linear salvo em {args.out}")
+    print(f"carga: joblib={t_joblib:.3f}s linear={t_linear:.3f}s")
+
+    if args.check:
+        from scipy.sparse import hstack, csr_matrix
+        from ..features.matrix import regex_feature_matrix
+        from ..io.load_data import load_batch
+
+        texts = load_batch(Path(args.check)).texts
+        X_num, _ = regex_feature_matrix(texts, bundle["regex_feature_cols"])
+        t0 = time.perf_counter()
+        ref = bundle["model"].predict_proba(hstack([bundle["vectorizer"].transform(texts), csr_matrix(X_num)]))[:, 1]
+        t_ref = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        got = scorer.predict_ml(texts, X_num)
+        t_got = time.perf_counter() - t0
+        diff = float(np.max(np.abs(ref - got))) if len(texts) else 0.0
+        print(f"equivalência: {len(texts)} textos, max |Δ| = {diff:.3g} | sklearn={t_ref:.3f}s linear={t_got:.3f}s")
+        if diff > args.tol:
+            print(f"FALHA: diferença acima da tolerância {args.tol}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
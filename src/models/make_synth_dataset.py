@@ -2,12 +2,21 @@ from __future__ import annotations
 
 import argparse
 import random
+import re
+import shutil
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import List
 
 import pandas as pd
 
-from ..io.load_data import load_records
-from ..features.regex_features import regex_signals
+from ..config import Defaults
+from ..io.columnar import is_columnar
+from ..io.load_data import iter_frames, iter_record_batches, load_batch
+from ..io.schemas import RecordBatch
+from ..io.writers import FrameWriter, write_frame
+from ..features.batch import batch_regex_signals, resolve_workers
+from ..utils.profiling import Profiler
 
 
 SYNTH_EMAILS = ["maria.silva@email.com", "joao.souza@exemplo.com", "ana.pereira@dominio.org"]
@@ -17,6 +26,9 @@ SYNTH_RGS = ["12.345.678-9", "1.234.567-X"]
 SYNTH_ADDRS = ["Rua das Flores, 123", "Av. Central, 1000", "Quadra 10 Conjunto B"]
 SYNTH_NAMES = ["Maria Silva", "João Souza", "Ana Pereira", "Carlos Oliveira"]
 
+# Sufixo das variantes de --variants-per-record
+VARIANT_SUFFIX = re.compile(r"-v\d+$")
+
 
 def inject_pii(text: str, rng: random.Random) -> tuple[str, dict]:
     """Retorna (texto_modificado, sinais_injetados)."""
@@ -44,33 +56,64 @@ def inject_pii(text: str, rng: random.Random) -> tuple[str, dict]:
     return new_text, {"injected_types": types, "injected_count": len(types)}
 
 
-def main() -> int:
-    ap = argparse.ArgumentParser(description="Gera dataset sintético rotulado (PII vs não-PII).")
-    ap.add_argument("--input", required=True, help="Arquivo de entrada (.xlsx/.csv/.jsonl)")
-    ap.add_argument("--out_csv", default="artifacts/reports/synth_dataset.csv", help="Saída CSV rotulada")
-    ap.add_argument("--seed", type=int, default=42)
-    ap.add_argument("--pos_ratio", type=float, default=0.5, help="Proporção de positivos")
-    args = ap.parse_args()
+def variant_pos_prob(pos_ratio: float, variants: int) -> float:
+    """Probabilidade de positivo por variante que devolve `pos_ratio` na saída.
 
-    rng = random.Random(args.seed)
-    records = load_records(Path(args.input))
-    if not records:
-        raise SystemExit("Dataset vazio.")
-
-    rows = []
-    for r in records:
-        if rng.random() < args.pos_ratio:
-            text2, meta = inject_pii(r.text, rng)
-            y = 1
+    Com V variantes e no máximo um negativo por registro, a fração esperada de positivos
+    é V*q / (V*q + 1 - q**V), crescente em q; a bissecção acha o q que dá `pos_ratio`.
+    Com V = 1 é o próprio pos_ratio.
+    """
+    if variants == 1 or pos_ratio <= 0.0 or pos_ratio >= 1.0:
+        return pos_ratio
+    lo, hi = 0.0, 1.0
+    for _ in range(60):
+        q = (lo + hi) / 2
+        if variants * q / (variants * q + 1 - q ** variants) < pos_ratio:
+            lo = q
         else:
-            text2 = r.text
-            meta = {"injected_types": [], "injected_count": 0}
-            y = 0
+            hi = q
+    return (lo + hi) / 2
+
+
+def _inject_batch(batch: RecordBatch, rng: random.Random, pos_ratio: float, variants: int) -> list:
+    """Sorteia rótulo/injeção por registro (e por variante), consumindo `rng` em ordem.
 
-        sig = regex_signals(text2)
+    O negativo é o texto original sem mudança: sai no máximo uma vez por registro de
+    origem (cópias idênticas só repetiriam a linha, e vazariam entre treino e validação).
+    Para a saída manter `pos_ratio`, cada variante sorteia positivo com
+    variant_pos_prob(pos_ratio, variants). As variantes de um registro saem juntas, com
+    ids <id>-v<n>.
+    """
+    q = variant_pos_prob(pos_ratio, variants)
+    generated = []
+    for rid, text in zip(batch.ids, batch.texts):
+        clean = False
+        for v in range(variants):
+            if rng.random() < q:
+                text2, meta = inject_pii(text, rng)
+                y = 1
+            elif clean:
+                continue
+            else:
+                text2 = text
+                meta = {"injected_types": [], "injected_count": 0}
+                y = 0
+                clean = True
+            generated.append((rid if variants == 1 else f"{rid}-v{v}", text2, y, meta))
+    return generated
+
+
+def source_id(rid: str) -> str:
+    """Id do registro de origem de uma variante (<id>-v<n> -> <id>)."""
+    return VARIANT_SUFFIX.sub("", rid)
+
+
+def _to_frame(generated: list, signals: list) -> pd.DataFrame:
+    rows = []
+    for (rid, text2, y, meta), sig in zip(generated, signals):
         rows.append(
             {
-                "id": r.id,
+                "id": rid,
                 "text": text2,
                 "label": y,
                 "injected_count": meta["injected_count"],
@@ -83,12 +126,135 @@ def main() -> int:
                 "has_zip": sig["has_zip"],
             }
         )
+    return pd.DataFrame(rows)
+
+
+def shard_seed(seed: int, shard: int) -> str:
+    # semente por shard: depende só de --seed e do índice, não de quantos processos rodam
+    return f"{seed}:{shard}"
+
+
+def _generate_shard(shard: int, batch: RecordBatch, seed: int, pos_ratio: float, variants: int, out_path: Path) -> tuple:
+    """Gera e grava um shard inteiro (roda num processo do pool); devolve (linhas, positivos)."""
+    generated = _inject_batch(batch, random.Random(shard_seed(seed, shard)), pos_ratio, variants)
+    df = _to_frame(generated, batch_regex_signals([g[1] for g in generated]))
+    write_frame(df, out_path)
+    return len(df), int(df["label"].sum())
+
 
-    df = pd.DataFrame(rows)
+def _merge_shards(parts: List[Path], out_path: Path) -> None:
+    """Concatena os shards na ordem, em streaming (CSV: bytes, sem repetir o cabeçalho)."""
+    if not is_columnar(out_path):
+        with out_path.open("wb") as out:
+            for i, part in enumerate(parts):
+                with part.open("rb") as f:
+                    if i:
+                        f.readline()
+                    shutil.copyfileobj(f, out)
+        return
+    with FrameWriter(out_path) as writer:
+        for part in parts:
+            for df in iter_frames(part, Defaults.chunk_size):
+                writer.write(df)
+
+
+def _run_sharded(args, profiler: Profiler) -> tuple:
+    """--shard-size: shards contíguos da entrada, gerados em paralelo e gravados em disco.
+
+    A leitura avança no máximo 2 * workers shards à frente da escrita, então a memória
+    fica limitada pelo tamanho do shard.
+    """
+    out_path = Path(args.out_csv)
+    shard_dir = out_path.with_name(out_path.name + ".shards")
+    shard_dir.mkdir(parents=True, exist_ok=True)
+    workers = resolve_workers(args.workers)
+    parts: List[Path] = []
+    n = positives = 0
+    pending = []
+
+    def drain(limit: int) -> None:
+        nonlocal n, positives
+        while len(pending) > limit:
+            rows, pos = pending.pop(0).result()
+            n += rows
+            positives += pos
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        batches = iter_record_batches(Path(args.input), chunk_size=args.shard_size)
+        for shard, batch in enumerate(profiler.iter("load", batches)):
+            part = shard_dir / f"part-{shard:05d}{out_path.suffix}"
+            parts.append(part)
+            pending.append(pool.submit(_generate_shard, shard, batch, args.seed, args.pos_ratio,
+                                       args.variants_per_record, part))
+            drain(2 * workers)
+        with profiler.stage("generate"):
+            drain(0)
+
+    if n == 0:
+        shutil.rmtree(shard_dir)
+        raise SystemExit("Dataset vazio.")
+    if not args.keep_shards:
+        with profiler.stage("merge", n):
+            _merge_shards(parts, out_path)
+        shutil.rmtree(shard_dir)
+        print(f"OK: dataset sintético salvo em {args.out_csv} ({n} linhas, {len(parts)} shards)")
+    else:
+        print(f"OK: dataset sintético salvo em {shard_dir} ({n} linhas, {len(parts)} shards)")
+    return n, positives
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Gera dataset sintético rotulado (PII vs não-PII).")
+    ap.add_argument("--input", required=True, help="Arquivo de entrada (.xlsx/.csv/.jsonl/.parquet/.arrow)")
+    ap.add_argument("--out_csv", default="artifacts/reports/synth_dataset.csv", help="Saída rotulada (.csv, ou .parquet/.arrow tipados)")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--pos_ratio", type=float, default=0.5, help="Proporção de positivos na saída (com --variants-per-record, já descontados os negativos repetidos)")
+    ap.add_argument("--workers", type=int, default=1, help="Processos para extração de regex / shards (0 = todos os núcleos)")
+    ap.add_argument("--variants-per-record", type=int, default=1,
+                    help="Variantes geradas por registro de origem (ids viram <id>-v<n> quando > 1; "
+                         "o negativo limpo sai no máximo uma vez por registro)")
+    ap.add_argument("--shard-size", type=int, default=0,
+                    help="Registros de origem por shard; > 0 gera shards em paralelo e em streaming, "
+                         "com semente por shard (resultado independe de --workers)")
+    ap.add_argument("--keep-shards", action="store_true", help="Mantém os shards em <saida>.shards/ em vez de juntá-los")
+    ap.add_argument("--profile", default=None, help="Grava relatório JSON de tempo/memória por estágio")
+    args = ap.parse_args()
+    if args.variants_per_record < 1:
+        raise SystemExit("--variants-per-record deve ser >= 1.")
+
+    profiler = Profiler("make_synth_dataset", enabled=bool(args.profile))
     Path(args.out_csv).parent.mkdir(parents=True, exist_ok=True)
-    df.to_csv(args.out_csv, index=False, encoding="utf-8")
+    if args.shard_size > 0:
+        n, positives = _run_sharded(args, profiler)
+        counts = pd.Series({0: n - positives, 1: positives}, name="count").rename_axis("label")
+        print("label counts:\n", counts.sort_values(ascending=False))
+        profiler.count("rows", n)
+        profiler.count("positives", positives)
+        if args.profile:
+            profiler.write(args.profile)
+        return 0
+
+    rng = random.Random(args.seed)
+    with profiler.stage("load"):
+        batch = load_batch(Path(args.input))
+    if not batch:
+        raise SystemExit("Dataset vazio.")
+    profiler.count("records", len(batch))
+
+    with profiler.stage("inject", len(batch)):
+        generated = _inject_batch(batch, rng, args.pos_ratio, args.variants_per_record)
+
+    with profiler.stage("regex_signals", len(generated)):
+        signals = batch_regex_signals([g[1] for g in generated], workers=args.workers)
+    df = _to_frame(generated, signals)
+
+    with profiler.stage("write", len(df)):
+        write_frame(df, Path(args.out_csv))
     print(f"OK: dataset sintético salvo em {args.out_csv} ({len(df)} linhas)")
     print("label counts:\n", df["label"].value_counts())
+    profiler.count("positives", int(df["label"].sum()))
+    if args.profile:
+        profiler.write(args.profile)
     return 0
 
 
@@ -5,36 +5,105 @@ from pathlib import Path
 
 import pandas as pd
 
-from ..io.load_data import load_records
-from ..features.regex_features import regex_signals, regex_score
+from ..io.load_data import cached_input, load_batch
+from ..io.writers import write_frame
+from ..features.regex_features import SIGNAL_KEYS, redact
+from ..features.matrix import signal_matrix, signal_matrix_with_spans, scores_from_signals
+from ..utils.cache import ScoreCache, cache_fingerprint, dedup_apply
+from ..utils.profiling import NULL_PROFILER, Profiler
 
+# Colunas de saída por texto (além do id)
+OUTPUT_COLUMNS = ["pred_label", "pred_score", "has_cpf", "has_email", "has_phone"]
+# Coluna extra do modo --redact: o texto com os dados pessoais mascarados
+REDACT_COLUMN = "redacted_text"
 
-def main() -> int:
+
+def score_texts(
+    texts: list[str],
+    threshold: float = 0.35,
+    workers: int = 1,
+    profiler: Profiler = NULL_PROFILER,
+    redact_output: bool = False,
+) -> pd.DataFrame:
+    """Score só de regras para um lote de textos (colunas OUTPUT_COLUMNS, na ordem de entrada).
+
+    Com `redact_output`, a mesma varredura devolve os trechos e a saída ganha REDACT_COLUMN.
+    """
+    with profiler.stage("regex_signals", len(texts)):
+        if redact_output:
+            S, spans = signal_matrix_with_spans(texts, workers=workers)
+        else:
+            S = signal_matrix(texts, workers=workers)
+    score = scores_from_signals(S)
+    df = pd.DataFrame({
+        "pred_label": (score >= threshold).astype(int),
+        "pred_score": score,
+        "has_cpf": S[:, SIGNAL_KEYS.index("has_cpf")] > 0,
+        "has_email": S[:, SIGNAL_KEYS.index("has_email")] > 0,
+        "has_phone": S[:, SIGNAL_KEYS.index("has_phone")] > 0,
+    })
+    if redact_output:
+        with profiler.stage("redact", len(texts)):
+            df[REDACT_COLUMN] = [redact(t, sp) for t, sp in zip(texts, spans)]
+    return df
+
+
+def run(
+    input_path: Path,
+    output: str,
+    threshold: float = 0.35,
+    workers: int = 1,
+    cache_path: str | None = None,
+    cache_max_entries: int = 1_000_000,
+    profile_path: str | None = None,
+    redact_output: bool = False,
+    xlsx_cache: bool = False,
+) -> int:
+    profiler = Profiler("predict", enabled=bool(profile_path))
+    with profiler.stage("load"):
+        batch = load_batch(cached_input(input_path) if xlsx_cache else Path(input_path))
+    profiler.count("records", len(batch))
+    columns = OUTPUT_COLUMNS + [REDACT_COLUMN] if redact_output else OUTPUT_COLUMNS
+    cache = None
+    if cache_path:
+        params = {"threshold": threshold, **({"redact": True} if redact_output else {})}
+        cache = ScoreCache(Path(cache_path), cache_fingerprint("regex", **params), cache_max_entries)
+
+    out = dedup_apply(
+        batch.texts, lambda ts: score_texts(ts, threshold, workers, profiler, redact_output), columns, cache
+    )
+    out.insert(0, "id", batch.ids)
+    with profiler.stage("write", len(out)):
+        write_frame(out, Path(output))
+    print(f"OK: gerado {output} com {len(out)} linhas")
+    if cache is not None:
+        cache.close()
+        print(cache.summary())
+        profiler.count("cache_hits", cache.hits)
+        profiler.count("cache_misses", cache.misses)
+    if profile_path:
+        profiler.write(profile_path)
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
     ap = argparse.ArgumentParser(description="Baseline: detector de dados pessoais (regex) + score.")
-    ap.add_argument("--input", required=True, help="Arquivo de entrada (.xlsx/.csv/.jsonl)")
-    ap.add_argument("--output", required=True, help="Arquivo de saída (.csv)")
+    ap.add_argument("--input", required=True, help="Arquivo de entrada (.xlsx/.csv/.jsonl/.parquet/.arrow)")
+    ap.add_argument("--output", required=True, help="Arquivo de saída (.csv, ou .parquet/.arrow tipados)")
     ap.add_argument("--threshold", type=float, default=0.35, help="Threshold para pred_label (0/1)")
-    args = ap.parse_args()
-
-    records = load_records(Path(args.input))
-    rows = []
-    for r in records:
-        sig = regex_signals(r.text)
-        score = regex_score(sig)
-        label = 1 if score >= args.threshold else 0
-        rows.append({
-            "id": r.id,
-            "pred_label": label,
-            "pred_score": float(score),
-            "has_cpf": sig["has_cpf"],
-            "has_email": sig["has_email"],
-            "has_phone": sig["has_phone"],
-        })
-
-    out = pd.DataFrame(rows)
-    out.to_csv(args.output, index=False, encoding="utf-8")
-    print(f"OK: gerado {args.output} com {len(out)} linhas")
-    return 0
+    ap.add_argument("--workers", type=int, default=1, help="Processos para extração de regex (0 = todos os núcleos)")
+    ap.add_argument("--cache", default=None, help="Cache SQLite de scores por texto (reaproveita pedidos repetidos)")
+    ap.add_argument("--cache-max-entries", type=int, default=1_000_000, help="Tamanho máximo do cache (entradas)")
+    ap.add_argument("--profile", default=None, help="Grava relatório JSON de tempo/memória por estágio")
+    ap.add_argument("--redact", action="store_true", help="Inclui redacted_text (texto com CPF/e-mail/telefone/RG/CEP mascarados)")
+    ap.add_argument("--xlsx-cache", action="store_true", help="Para .xlsx: lê de uma cópia .arrow guardada ao lado da planilha (refeita se o arquivo mudar)")
+    args = ap.parse_args(argv)
+
+    return run(
+        Path(args.input), args.output, threshold=args.threshold, workers=args.workers,
+        cache_path=args.cache, cache_max_entries=args.cache_max_entries, profile_path=args.profile,
+        redact_output=args.redact, xlsx_cache=args.xlsx_cache,
+    )
 
 if __name__ == "__main__":
     raise SystemExit(main())
@@ -1,104 +1,700 @@
 from __future__ import annotations
 
 import argparse
+import os
+import re
+import shutil
 from pathlib import Path
+from typing import Callable, List, Set
 
-import joblib
 import numpy as np
 import pandas as pd
-from scipy.sparse import hstack, csr_matrix
 
-from ..io.load_data import load_records
-from ..features.regex_features import regex_signals, regex_score
+from ..config import Defaults
+from ..io.load_data import cached_input, iter_record_batches, load_batch
+from ..io.writers import FrameWriter, write_frame
+from ..features.names import name_pattern
+from ..features.regex_features import SIGNAL_KEYS, redact
+from ..features.matrix import (
+    signal_matrix, signal_matrix_with_spans, features_from_signals, scores_from_signals,
+)
+from ..utils.cache import ScoreCache, cache_fingerprint, dedup_apply
+from ..utils.checkpoint import Checkpoint, file_identity, read_output_header, read_output_ids
+from ..utils.profiling import NULL_PROFILER, Profiler
+from ..utils.topk import TopK
+from .linear_scorer import LinearScorer, is_linear_artifact
+from .predict import REDACT_COLUMN
+from .sweep import ScoreRecorder
 
 # Se o regex indicar fortemente presença de PII, não deixamos o ML derrubar o caso.
 # Isso reduz falsos negativos mantendo explicabilidade e controle de FP via threshold.
-def main() -> int:
-    ap = argparse.ArgumentParser(description="Predição híbrida: TF-IDF+LogReg + regex score (mix por alpha).")
-    ap.add_argument("--input", required=True, help="Arquivo de entrada (.xlsx/.csv/.jsonl)")
-    ap.add_argument("--model", required=True, help="Modelo híbrido .joblib")
-    ap.add_argument("--output", required=True, help="Saída .csv (padronizada)")
-    ap.add_argument("--alpha", type=float, default=0.70, help="Peso do ML no score final (0..1)")
-    ap.add_argument("--threshold", type=float, default=0.30, help="Threshold para pred_label (0/1)")
-    args = ap.parse_args()
+REGEX_FORCE_THR = 0.35  # casos óbvios pelo baseline
+
+# Colunas de saída por texto (além do id)
+OUTPUT_COLUMNS = [
+    "pred_label", "pred_score", "ml_score", "regex_score",
+    "has_cpf", "has_email", "has_phone", "forced_by_regex",
+]
+
+# --cascade: etapa que decidiu cada registro (coluna extra da saída)
+DECIDED_COLUMN = "decided_by"
+CASCADE_TIERS = ("prefilter", "regex", "ml")
+
+# Sem dígito nem "@", nenhum padrão numérico ou de e-mail pode casar.
+_RE_TRIGGER = re.compile(r"[\d@]")
+
+
+def load_bundle(model: str | Path, mmap_mode: str | None = None) -> dict:
+    """Carrega o .joblib do train_hybrid ou um artefato linear compilado (diretório).
+
+    Com mmap_mode="r", os arrays do .joblib (idf_, coef_) são mapeados do arquivo em vez
+    de copiados: processos que carregam o mesmo modelo compartilham as páginas. O
+    artefato linear já é sempre aberto assim.
+    """
+    if is_linear_artifact(Path(model)):
+        scorer = LinearScorer(Path(model))
+        return {"scorer": scorer, "regex_feature_cols": scorer.regex_feature_cols}
+
+    import joblib
+
+    return joblib.load(model, mmap_mode=mmap_mode)
 
-    bundle = joblib.load(args.model)
-    vec = bundle["vectorizer"]
-    clf = bundle["model"]
+
+def score_texts(
+    bundle: dict,
+    ids: List[str],
+    texts: List[str],
+    alpha: float,
+    threshold: float,
+    regex_force_thr: float = REGEX_FORCE_THR,
+    workers: int = 1,
+    profiler: Profiler = NULL_PROFILER,
+    redact_output: bool = False,
+    cascade: bool = False,
+) -> pd.DataFrame:
+    """Pontua um lote de textos; devolve o DataFrame de saída na ordem de entrada.
+
+    Com `redact_output`, os trechos saem da mesma varredura do regex e a saída ganha
+    a coluna REDACT_COLUMN. Com `cascade`, só os registros ainda indecididos depois do
+    regex passam pelo modelo (ver _cascade_decided); os demais ficam com ml_score e
+    pred_score vazios (NaN) e a saída ganha DECIDED_COLUMN. Sem score para todos, o
+    run() recusa ordenar ou fazer top-k.
+    """
     regex_cols = bundle["regex_feature_cols"]
+    n = len(texts)
+
+    # regex features numéricas (mesma ordem do treino; injected_count fica 0 no real input)
+    if cascade:
+        S, spans, trigger = _cascade_signals(texts, workers, redact_output, profiler)
+    else:
+        with profiler.stage("regex_signals", n):
+            if redact_output:
+                S, spans = signal_matrix_with_spans(texts, workers=workers)
+            else:
+                S = signal_matrix(texts, workers=workers)
+    X_num = features_from_signals(S, regex_cols)
+    regex_score_arr = scores_from_signals(S)
+
+    alpha = float(alpha)
+    todo = None
+    if cascade:
+        with profiler.stage("cascade", n):
+            decided = _cascade_decided(regex_score_arr, alpha, float(threshold), regex_force_thr)
+            todo = np.flatnonzero(~decided)
+        profiler.count("ml_scored", len(todo))
+        ml_score = np.full(n, np.nan)
+        if len(todo):
+            ml_score[todo] = _ml_score(bundle, [texts[i] for i in todo], X_num[todo], profiler)
+    else:
+        ml_score = _ml_score(bundle, texts, X_num, profiler)
+
+    with profiler.stage("blend", n):
+        # decididos sem o modelo: o rótulo sai com ml_score 0 (dá o mesmo com 1) e o score fica vazio
+        ml_part = ml_score if todo is None else np.where(decided, 0.0, ml_score)
+        score_final = alpha * ml_part + (1.0 - alpha) * regex_score_arr
+
+        pred_label = (score_final >= float(threshold)).astype(int)
+
+        # fallback: não perder óbvios do regex
+        forced = regex_score_arr >= regex_force_thr
+        pred_label = np.where(forced, 1, pred_label)
+        if todo is not None:
+            score_final = np.where(decided, np.nan, score_final)
+
+    df = pd.DataFrame({
+        "id": ids,
+        "pred_label": pred_label.astype(int),
+        "pred_score": score_final,
+        # debug explicável
+        "ml_score": ml_score,
+        "regex_score": regex_score_arr,
+        "has_cpf": S[:, SIGNAL_KEYS.index("has_cpf")] > 0,
+        "has_email": S[:, SIGNAL_KEYS.index("has_email")] > 0,
+        "has_phone": S[:, SIGNAL_KEYS.index("has_phone")] > 0,
+        "forced_by_regex": forced,
+    })
+    if cascade:
+        tier = np.where(trigger, "regex", "prefilter")
+        df[DECIDED_COLUMN] = np.where(decided, tier, "ml")
+    if redact_output:
+        with profiler.stage("redact", n):
+            df[REDACT_COLUMN] = [redact(t, sp) for t, sp in zip(texts, spans)]
+    return df
+
+
+def _ml_score(bundle: dict, texts: List[str], X_num: np.ndarray, profiler: Profiler = NULL_PROFILER) -> np.ndarray:
+    n = len(texts)
+    if "scorer" in bundle:
+        # artefato linear: ml_score direto dos tokens, sem TF-IDF + hstack
+        with profiler.stage("linear_ml_score", n):
+            return bundle["scorer"].predict_ml(texts, X_num)
+
+    from scipy.sparse import hstack, csr_matrix
+
+    with profiler.stage("tfidf_transform", n):
+        X_tfidf = bundle["vectorizer"].transform(texts)
+    with profiler.stage("hstack", n):
+        X = hstack([X_tfidf, csr_matrix(X_num)])
+    with profiler.stage("predict_proba", n):
+        return bundle["model"].predict_proba(X)[:, 1].astype(float)
+
+
+def _cascade_signals(
+    texts: List[str], workers: int, redact_output: bool, profiler: Profiler = NULL_PROFILER
+) -> tuple:
+    """Sinais do --cascade em duas etapas; devolve (S, trechos ou None, máscara com gatilho).
+
+    Pré-filtro: texto sem dígito nem "@" não casa nenhum padrão numérico ou de e-mail, então
+    só o detector de nomes roda nele. Os demais passam pela varredura completa. S sai
+    idêntico ao de signal_matrix.
+    """
+    n = len(texts)
+    S = np.zeros((n, len(SIGNAL_KEYS)), dtype=float)
+    spans: List[list] | None = [[] for _ in range(n)] if redact_output else None
+    with profiler.stage("prefilter", n):
+        trigger = np.fromiter((_RE_TRIGGER.search(t) is not None for t in texts), dtype=bool, count=n)
+        names = name_pattern()
+        has_name, name_count = SIGNAL_KEYS.index("has_name_like"), SIGNAL_KEYS.index("name_count")
+        for i in np.flatnonzero(~trigger):
+            found = [m.span() for m in names.finditer(texts[i])]
+            S[i, has_name] = bool(found)
+            S[i, name_count] = len(found)
+            if spans is not None:
+                spans[i] = [("name", a, b) for a, b in found]
+    hit = np.flatnonzero(trigger)
+    profiler.count("prefilter_skipped", n - len(hit))
+    if len(hit):
+        sub = [texts[i] for i in hit]
+        with profiler.stage("regex_signals", len(hit)):
+            if spans is not None:
+                S_hit, sub_spans = signal_matrix_with_spans(sub, workers=workers)
+                for i, sp in zip(hit, sub_spans):
+                    spans[i] = sp
+            else:
+                S_hit = signal_matrix(sub, workers=workers)
+        S[hit] = S_hit
+    return S, spans, trigger
+
+
+def _cascade_decided(regex_score: np.ndarray, alpha: float, threshold: float, regex_force_thr: float) -> np.ndarray:
+    """Registros cujo pred_label já não depende do ml_score.
+
+    Forçados pelo regex, ou aqueles em que o rótulo é o mesmo com ml_score 0 e 1: o score
+    é monótono no ml_score (também em ponto flutuante), então as duas pontas bastam. Os
+    limites usam a mesma expressão do blend, então os rótulos são idênticos aos do modo normal.
+    """
+    low = alpha * 0.0 + (1.0 - alpha) * regex_score
+    high = alpha * 1.0 + (1.0 - alpha) * regex_score
+    return (regex_score >= regex_force_thr) | (low >= threshold) | (high < threshold)
+
+
+def _output_columns(redact_output: bool, cascade: bool = False) -> List[str]:
+    columns = OUTPUT_COLUMNS + [DECIDED_COLUMN] if cascade else OUTPUT_COLUMNS
+    return columns + [REDACT_COLUMN] if redact_output else columns
+
+
+def _print_summary(path: str, n: int, alpha: float, thr: float, label_counts: pd.Series, smin: float, smean: float, smax: float) -> None:
+    print(f"OK: gerado {path} com {n} linhas | alpha={alpha} thr={thr}")
+    print("pred_label counts:\n", label_counts)
+    print("score stats:", smin, smean, smax)
+
+
+def _score_batch(
+    bundle: dict,
+    ids: List[str],
+    texts: List[str],
+    alpha: float,
+    threshold: float,
+    workers: int = 1,
+    cache: ScoreCache | None = None,
+    profiler: Profiler = NULL_PROFILER,
+    redact_output: bool = False,
+    regex_force_thr: float = REGEX_FORCE_THR,
+    cascade: bool = False,
+) -> pd.DataFrame:
+    """score_texts com deduplicação dentro do lote (e cache em disco, se houver)."""
+    def compute(uniq: List[str]) -> pd.DataFrame:
+        profiler.count("scored_texts", len(uniq))
+        return score_texts(bundle, uniq, uniq, alpha, threshold, regex_force_thr, workers=workers,
+                           profiler=profiler, redact_output=redact_output, cascade=cascade)
+
+    df = dedup_apply(texts, compute, _output_columns(redact_output, cascade), cache)
+    df.insert(0, "id", ids)
+    return df
+
+
+def _append_csv(df: pd.DataFrame, path: Path, header: bool, sync: bool) -> None:
+    with path.open("w" if header else "a", encoding="utf-8", newline="") as f:
+        df.to_csv(f, index=False, header=header)
+        if sync:
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def _run_streaming(
+    score: Callable[[List[str], List[str]], pd.DataFrame],
+    input_path: Path,
+    output: str,
+    alpha: float,
+    threshold: float,
+    chunk_size: int,
+    topk: TopK | None,
+    skip_ids: Set[str] | None = None,
+    append: bool = False,
+    checkpoint: Checkpoint | None = None,
+    profiler: Profiler = NULL_PROFILER,
+) -> int:
+    """Modo --chunk-size: pontua e grava lote a lote (memória constante).
+
+    `skip_ids` pula registros já pontuados (retomada/incremental) e `append` acrescenta
+    à saída existente; com `checkpoint`, cada lote é sincronizado em disco antes de
+    o estado avançar.
+    """
+    out_path = Path(output)
+    n = 0
+    skipped = 0
+    label_counts = pd.Series(dtype="int64")
+    # stats só sobre os registros com pred_score (no --cascade, os decididos sem o modelo ficam vazios)
+    smin, smax, ssum, n_scored = float("inf"), float("-inf"), 0.0, 0
+    header = not append
+    # com checkpoint a saída é CSV (truncável); sem ele, qualquer formato de write_frame
+    writer = FrameWriter(out_path) if topk is None and checkpoint is None and not append else None
+
+    for batch in profiler.iter("load", iter_record_batches(input_path, chunk_size=chunk_size)):
+        if skip_ids:
+            keep = [i for i, rid in enumerate(batch.ids) if rid not in skip_ids]
+            skipped += len(batch) - len(keep)
+            if not keep:
+                continue
+            batch = batch.take(keep)
+        df = score(batch.ids, batch.texts)
+        if topk is not None:
+            with profiler.stage("top_k", len(df)):
+                topk.push_frame(df)
+        elif writer is not None:
+            with profiler.stage("write", len(df)):
+                writer.write(df)
+        else:
+            with profiler.stage("write", len(df)):
+                _append_csv(df, out_path, header, sync=checkpoint is not None)
+                header = False
+                if checkpoint is not None:
+                    checkpoint.commit(len(df))
+        n += len(df)
+        label_counts = label_counts.add(df["pred_label"].value_counts(), fill_value=0).astype("int64")
+        scored = df["pred_score"].dropna()
+        if len(scored):
+            smin = min(smin, float(scored.min()))
+            smax = max(smax, float(scored.max()))
+            ssum += float(scored.sum())
+            n_scored += len(scored)
 
-    records = load_records(Path(args.input))
-    if not records:
+    if writer is not None:
+        writer.close()
+    if skip_ids is not None:
+        print(f"{skipped} registros já pontuados foram pulados")
+    if n == 0:
+        if skip_ids is not None:
+            print(f"OK: nada novo para pontuar; {output} mantido")
+            return 0
         raise SystemExit("Entrada vazia.")
+    if topk is not None:
+        with profiler.stage("write", len(topk)):
+            write_frame(topk.to_frame(), out_path)
 
-    texts = [r.text for r in records]
-    ids = [r.id for r in records]
-
-    # TF-IDF
-    X_tfidf = vec.transform(texts)
-
-    # regex features numéricas (mesma ordem do treino)
-    feats = []
-    regex_scores = []
-    main_signals = []
-    for t in texts:
-        sig = regex_signals(t)
-        rs = regex_score(sig)
-        regex_scores.append(rs)
-
-        row = []
-        for c in regex_cols:
-            if c == "injected_count":
-                row.append(0.0)  # no real input não existe; mantemos 0
+    profiler.count("records", n)
+    if n_scored == 0:
+        smin = smax = float("nan")
+    _print_summary(output, n, float(alpha), threshold, label_counts, smin,
+                   ssum / n_scored if n_scored else float("nan"), smax)
+    if topk is not None:
+        print(f"top-k: {len(topk)} de {n} registros gravados")
+    return 0
+
+
+def run(
+    input_path: Path,
+    model: str,
+    output: str,
+    alpha: float = 0.70,
+    threshold: float = 0.30,
+    chunk_size: int = 0,
+    no_sort: bool = False,
+    top_k: int = 0,
+    workers: int = 1,
+    cache_path: str | None = None,
+    cache_max_entries: int = 1_000_000,
+    resume: bool = False,
+    incremental: str | None = None,
+    profile_path: str | None = None,
+    redact_output: bool = False,
+    force_thr: float = REGEX_FORCE_THR,
+    scores_out: str | None = None,
+    shards: int = 0,
+    xlsx_cache: bool = False,
+    cascade: bool = False,
+) -> int:
+    if cascade and scores_out:
+        raise SystemExit("--scores-out precisa do ml_score de todos os registros; não combina com --cascade.")
+    if cascade and (top_k > 0 or not (no_sort or chunk_size > 0)):
+        # pred_score dos decididos sem o modelo é só a parte do regex: ordenar por ele mudaria o resultado
+        raise SystemExit("--cascade não ordena por score: use --no-sort ou --chunk-size (sem --top-k).")
+    if shards > 1 and (resume or incremental or cache_path):
+        raise SystemExit("--shards não combina com --resume/--incremental/--cache.")
+    if shards > 1 and workers != 1:
+        # cada shard já é um processo; um pool de regex dentro de cada um só disputaria os núcleos
+        raise SystemExit("--shards já paraleliza a inferência inteira: não combine com --workers.")
+    if (resume or incremental) and top_k > 0:
+        raise SystemExit("--resume/--incremental não combinam com --top-k.")
+    if (resume or incremental) and Path(output).suffix.lower() != ".csv":
+        raise SystemExit("--resume/--incremental exigem saída .csv.")
+    profiler = Profiler("predict_hybrid", enabled=bool(profile_path))
+    topk = TopK(top_k) if top_k > 0 else None
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    recorder = ScoreRecorder() if scores_out else None
+    tiers = pd.Series(dtype="int64")
+
+    def observe(df: pd.DataFrame) -> None:
+        nonlocal tiers
+        if recorder is not None:
+            recorder.add(df)
+        if cascade:
+            tiers = tiers.add(df[DECIDED_COLUMN].value_counts(), fill_value=0)
+
+    source = Path(input_path)
+    if xlsx_cache:
+        with profiler.stage("xlsx_cache"):
+            source = cached_input(source)
+
+    if shards > 1:
+        opts = {"alpha": alpha, "threshold": threshold, "regex_force_thr": force_thr,
+                "redact_output": redact_output, "cascade": cascade}
+        rc = _run_sharded(model, source, output, opts, shards, chunk_size or Defaults.chunk_size,
+                          no_sort or chunk_size > 0, topk, observe, profiler)
+        _finish_run(recorder, scores_out, profiler, profile_path, tiers if cascade else None)
+        return rc
+
+    with profiler.stage("load_model"):
+        bundle = load_bundle(model)
+
+    cache = None
+    if cache_path:
+        fp = cache_fingerprint("hybrid", model=Path(model), alpha=float(alpha), threshold=float(threshold),
+                               regex_force_thr=float(force_thr), **({"redact": True} if redact_output else {}),
+                               **({"cascade": True} if cascade else {}))
+        cache = ScoreCache(Path(cache_path), fp, cache_max_entries)
+
+    def score(ids: List[str], texts: List[str]) -> pd.DataFrame:
+        df = _score_batch(bundle, ids, texts, alpha, threshold, workers=workers, cache=cache, profiler=profiler,
+                          redact_output=redact_output, regex_force_thr=force_thr, cascade=cascade)
+        observe(df)
+        return df
+
+    try:
+        if resume or incremental:
+            rc = _run_checkpointed(score, source, model, output, alpha, threshold,
+                                   chunk_size or Defaults.chunk_size, resume, incremental, profiler,
+                                   redact_output=redact_output, force_thr=force_thr, cascade=cascade,
+                                   original_input=Path(input_path))
+        elif chunk_size > 0:
+            rc = _run_streaming(score, source, output, alpha, threshold, chunk_size, topk,
+                                profiler=profiler)
+        else:
+            rc = _run_in_memory(score, source, output, alpha, threshold, no_sort, topk, profiler)
+    finally:
+        if cache is not None:
+            cache.close()
+            print(cache.summary())
+            profiler.count("cache_hits", cache.hits)
+            profiler.count("cache_misses", cache.misses)
+    _finish_run(recorder, scores_out, profiler, profile_path, tiers if cascade else None)
+    return rc
+
+
+def _finish_run(
+    recorder: ScoreRecorder | None,
+    scores_out: str | None,
+    profiler: Profiler,
+    profile_path: str | None,
+    tiers: pd.Series | None = None,
+) -> None:
+    if tiers is not None:
+        counts = {t: int(tiers.get(t, 0)) for t in CASCADE_TIERS}
+        total = sum(counts.values())
+        print(f"cascata ({DECIDED_COLUMN}):", counts, f"| sem ML: {total - counts['ml']} de {total}")
+        for t, c in counts.items():
+            profiler.count(f"decided_by_{t}", c)
+    if recorder is not None:
+        recorder.save(Path(scores_out))
+        print(f"OK: scores brutos ({len(recorder)} linhas) salvos em {scores_out}")
+    if profile_path:
+        profiler.write(profile_path)
+
+
+# Estado de cada processo do --shards: o bundle é carregado uma vez por processo, com mmap.
+_SHARD_STATE: dict = {}
+
+
+def _init_shard_worker(model: str, opts: dict) -> None:
+    _SHARD_STATE["bundle"] = load_bundle(model, mmap_mode="r")
+    _SHARD_STATE["opts"] = opts
+
+
+def _score_shard(ids: List[str], texts: List[str], part: Path, sort: bool) -> tuple:
+    """Pontua um trecho contíguo da entrada e grava o resultado em `part` (pickle, sem perda)."""
+    opts = _SHARD_STATE["opts"]
+    df = _score_batch(_SHARD_STATE["bundle"], ids, texts, opts["alpha"], opts["threshold"],
+                      redact_output=opts["redact_output"], regex_force_thr=opts["regex_force_thr"],
+                      cascade=opts["cascade"])
+    if sort:
+        df = df.sort_values("pred_score", ascending=False, kind="stable")
+    df.to_pickle(part)
+    s = df["pred_score"].dropna()
+    return len(df), df["pred_label"].value_counts(), len(s), float(s.min()), float(s.sum()), float(s.max())
+
+
+def _run_sharded(
+    model: str,
+    input_path: Path,
+    output: str,
+    opts: dict,
+    shards: int,
+    chunk_size: int,
+    no_sort: bool,
+    topk: TopK | None,
+    observe: Callable[[pd.DataFrame], None],
+    profiler: Profiler = NULL_PROFILER,
+) -> int:
+    """--shards N: N processos pontuam trechos contíguos de chunk_size registros.
+
+    Cada processo carrega o modelo uma vez, com os arrays mapeados do arquivo (mmap),
+    e grava seu trecho num arquivo temporário. Depois os trechos são juntados na ordem
+    de entrada ou, com ordenação, por score: cada trecho volta ordenado e a ordenação
+    estável do conjunto só intercala os trechos (empates ficam na ordem de entrada).
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    out_path = Path(output)
+    part_dir = out_path.with_name(out_path.name + ".shards")
+    part_dir.mkdir(parents=True, exist_ok=True)
+    sort = topk is None and not no_sort
+    parts: List[Path] = []
+    pending = []
+    n = 0
+    label_counts = pd.Series(dtype="int64")
+    # stats só sobre os registros com pred_score (no --cascade, os decididos sem o modelo ficam vazios)
+    smin, smax, ssum, n_scored = float("inf"), float("-inf"), 0.0, 0
+
+    def drain(limit: int) -> None:
+        nonlocal n, label_counts, smin, smax, ssum, n_scored
+        while len(pending) > limit:
+            rows, counts, scored, lo, total, hi = pending.pop(0).result()
+            n += rows
+            label_counts = label_counts.add(counts, fill_value=0).astype("int64")
+            if scored:
+                smin, smax, ssum, n_scored = min(smin, lo), max(smax, hi), ssum + total, n_scored + scored
+
+    try:
+        with ProcessPoolExecutor(max_workers=shards, initializer=_init_shard_worker, initargs=(model, opts)) as pool:
+            batches = iter_record_batches(input_path, chunk_size=chunk_size)
+            for i, batch in enumerate(profiler.iter("load", batches)):
+                part = part_dir / f"part-{i:05d}.pkl"
+                parts.append(part)
+                pending.append(pool.submit(_score_shard, batch.ids, batch.texts, part, sort))
+                drain(2 * shards)  # limita quantos trechos ficam em memória ao mesmo tempo
+            with profiler.stage("score_shards"):
+                drain(0)
+        if n == 0:
+            raise SystemExit("Entrada vazia.")
+
+        with profiler.stage("merge", n):
+            if sort:
+                df = pd.concat([pd.read_pickle(p) for p in parts], ignore_index=True)
+                order = np.argsort(-df["pred_score"].to_numpy(), kind="stable")
+                df = df.iloc[order]
+                observe(df)
+                write_frame(df, out_path)
             else:
-                row.append(float(bool(sig.get(c.replace("has_", "has_"), False)) if c.startswith("has_") else sig.get(c, 0)))
-        feats.append(row)
-
-        main_signals.append({
-            "has_cpf": sig["has_cpf"],
-            "has_email": sig["has_email"],
-            "has_phone": sig["has_phone"],
-        })
-
-    X_num = csr_matrix(np.array(feats, dtype=float))
-    X = hstack([X_tfidf, X_num])
-
-    ml_score = clf.predict_proba(X)[:, 1].astype(float)
-    regex_score_arr = np.array(regex_scores, dtype=float)
-
-    alpha = float(args.alpha)
-    score_final = alpha * ml_score + (1.0 - alpha) * regex_score_arr
-    base_thr = float(args.threshold)
-    regex_force_thr = 0.35  # casos óbvios pelo baseline
-
-    pred_label = (score_final >= base_thr).astype(int)
-
-    # fallback: não perder óbvios do regex
-    pred_label = np.where(regex_score_arr >= regex_force_thr, 1, pred_label)
-
-    out_rows = []
-    for i in range(len(ids)):
-        out_rows.append({
-            "id": ids[i],
-            "pred_label": int(pred_label[i]),
-            "pred_score": float(score_final[i]),
-            # debug explicável
-            "ml_score": float(ml_score[i]),
-            "regex_score": float(regex_score_arr[i]),
-            "has_cpf": bool(main_signals[i]["has_cpf"]),
-            "has_email": bool(main_signals[i]["has_email"]),
-            "has_phone": bool(main_signals[i]["has_phone"]),
-            "forced_by_regex": bool(regex_score_arr[i] >= regex_force_thr)
-        })
-
-    df = pd.DataFrame(out_rows).sort_values("pred_score", ascending=False)
-    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
-    df.to_csv(args.output, index=False, encoding="utf-8")
-    print(f"OK: gerado {args.output} com {len(df)} linhas | alpha={alpha} thr={args.threshold}")
-    print("pred_label counts:\n", df["pred_label"].value_counts(dropna=False))
-    print("score stats:", df["pred_score"].min(), df["pred_score"].mean(), df["pred_score"].max())
+                with FrameWriter(out_path) as writer:
+                    for p in parts:
+                        df = pd.read_pickle(p)
+                        observe(df)
+                        if topk is not None:
+                            topk.push_frame(df)
+                        else:
+                            writer.write(df)
+                if topk is not None:
+                    write_frame(topk.to_frame(), out_path)
+    finally:
+        shutil.rmtree(part_dir, ignore_errors=True)
+
+    profiler.count("records", n)
+    if n_scored == 0:
+        smin = smax = float("nan")
+    _print_summary(output, n, float(opts["alpha"]), opts["threshold"], label_counts, smin,
+                   ssum / n_scored if n_scored else float("nan"), smax)
+    if topk is not None:
+        print(f"top-k: {len(topk)} de {n} registros gravados")
+    return 0
+
+
+def _run_checkpointed(
+    score: Callable[[List[str], List[str]], pd.DataFrame],
+    input_path: Path,
+    model: str,
+    output: str,
+    alpha: float,
+    threshold: float,
+    chunk_size: int,
+    resume: bool,
+    incremental: str | None,
+    profiler: Profiler = NULL_PROFILER,
+    redact_output: bool = False,
+    force_thr: float = REGEX_FORCE_THR,
+    cascade: bool = False,
+    original_input: Path | None = None,
+) -> int:
+    """--resume / --incremental: saída em lotes, na ordem de entrada, sem ordenação global.
+
+    O checkpoint identifica a entrada e o modelo por caminho absoluto, tamanho e mtime
+    (de `original_input` quando `input_path` é a cópia do --xlsx-cache).
+    """
+    out_path = Path(output)
+    run_meta = {"input": file_identity(original_input or input_path), "model": file_identity(Path(model)),
+                "alpha": float(alpha), "threshold": float(threshold)}
+    if redact_output:
+        run_meta["redact"] = True
+    if force_thr != REGEX_FORCE_THR:
+        run_meta["force_thr"] = float(force_thr)
+    if cascade:
+        run_meta["cascade"] = True
+    checkpoint = Checkpoint(out_path, run_meta) if resume else None
+
+    if checkpoint is not None and checkpoint.exists():
+        skip_ids = checkpoint.restore()
+        print(f"retomando {output}: {len(skip_ids)} registros já gravados")
+        append = True
+    elif incremental:
+        prev = Path(incremental)
+        if not prev.exists():
+            raise SystemExit(f"Saída anterior não encontrada: {prev}")
+        if read_output_header(prev) != ["id"] + _output_columns(redact_output, cascade):
+            raise SystemExit(f"{prev} não tem as colunas da saída do predict_hybrid.")
+        if prev.resolve() != out_path.resolve():
+            shutil.copyfile(prev, out_path)
+        skip_ids = read_output_ids(out_path)
+        print(f"incremental sobre {prev}: {len(skip_ids)} ids já pontuados")
+        append = True
+    else:
+        skip_ids, append = None, False
+
+    rc = _run_streaming(score, input_path, output, alpha, threshold, chunk_size, None,
+                        skip_ids=skip_ids, append=append, checkpoint=checkpoint, profiler=profiler)
+    if checkpoint is not None:
+        checkpoint.finish()
+    return rc
+
+
+def _run_in_memory(
+    score: Callable[[List[str], List[str]], pd.DataFrame],
+    input_path: Path,
+    output: str,
+    alpha: float,
+    threshold: float,
+    no_sort: bool,
+    topk: TopK | None,
+    profiler: Profiler = NULL_PROFILER,
+) -> int:
+    with profiler.stage("load"):
+        batch = load_batch(input_path)
+    if not batch:
+        raise SystemExit("Entrada vazia.")
+    profiler.count("records", len(batch))
+
+    df = score(batch.ids, batch.texts)
+    alpha = float(alpha)
+    label_counts = df["pred_label"].value_counts(dropna=False)
+    stats = (df["pred_score"].min(), df["pred_score"].mean(), df["pred_score"].max())
+    n = len(df)
+
+    if topk is not None:
+        with profiler.stage("top_k", n):
+            topk.push_frame(df)
+            df = topk.to_frame()
+    elif not no_sort:
+        with profiler.stage("sort", n):
+            df = df.sort_values("pred_score", ascending=False)
+
+    with profiler.stage("write", len(df)):
+        write_frame(df, Path(output))
+    _print_summary(output, n, alpha, threshold, label_counts, *stats)
+    if topk is not None:
+        print(f"top-k: {len(topk)} de {n} registros gravados")
     return 0
 
 
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Predição híbrida: TF-IDF+LogReg + regex score (mix por alpha).")
+    ap.add_argument("--input", required=True, help="Arquivo de entrada (.xlsx/.csv/.jsonl/.parquet/.arrow)")
+    ap.add_argument("--model", required=True, help="Modelo híbrido .joblib ou diretório do artefato linear (linear_scorer)")
+    ap.add_argument("--output", required=True, help="Saída padronizada (.csv, ou .parquet/.arrow tipados)")
+    ap.add_argument("--alpha", type=float, default=0.70, help="Peso do ML no score final (0..1)")
+    ap.add_argument("--threshold", type=float, default=0.30, help="Threshold para pred_label (0/1)")
+    ap.add_argument("--chunk-size", type=int, default=0,
+                    help="Processa e grava em lotes deste tamanho (0 = tudo em memória). A saída segue a ordem de entrada")
+    ap.add_argument("--no-sort", action="store_true", help="Não ordena a saída por pred_score (mantém a ordem de entrada)")
+    ap.add_argument("--top-k", type=int, default=0, help="Grava apenas os K registros de maior pred_score (0 = todos)")
+    ap.add_argument("--workers", type=int, default=1, help="Processos para extração de regex (0 = todos os núcleos)")
+    ap.add_argument("--cache", default=None, help="Cache SQLite de scores por texto (reaproveita pedidos repetidos)")
+    ap.add_argument("--cache-max-entries", type=int, default=1_000_000, help="Tamanho máximo do cache (entradas)")
+    ap.add_argument("--resume", action="store_true",
+                    help="Grava checkpoint (<saida>.ckpt) por lote e retoma uma execução interrompida")
+    ap.add_argument("--incremental", default=None,
+                    help="Saída anterior: pontua só ids que não estão nela e acrescenta ao resultado")
+    ap.add_argument("--profile", default=None, help="Grava relatório JSON de tempo/memória por estágio")
+    ap.add_argument("--redact", action="store_true", help="Inclui redacted_text (texto com CPF/e-mail/telefone/RG/CEP mascarados)")
+    ap.add_argument("--force-thr", type=float, default=REGEX_FORCE_THR,
+                    help="regex_score a partir do qual o rótulo é forçado para 1 (forced_by_regex)")
+    ap.add_argument("--shards", type=int, default=0,
+                    help="Processos de inferência: cada um pontua trechos contíguos de --chunk-size registros "
+                         "com o modelo mapeado em memória (0/1 = processo único; não combina com --workers)")
+    ap.add_argument("--cascade", action="store_true",
+                    help="Só registros que o regex não decide passam pelo modelo (mesmos rótulos; coluna decided_by)")
+    ap.add_argument("--xlsx-cache", action="store_true", help="Para .xlsx: lê de uma cópia .arrow guardada ao lado da planilha (refeita se o arquivo mudar)")
+    ap.add_argument("--scores-out", default=None,
+                    help="Grava ml_score/regex_score brutos (.npz) para o sweep (python -m src.models.sweep)")
+    args = ap.parse_args(argv)
+
+    return run(
+        Path(args.input), args.model, args.output,
+        alpha=args.alpha, threshold=args.threshold,
+        chunk_size=args.chunk_size, no_sort=args.no_sort, top_k=args.top_k, workers=args.workers,
+        cache_path=args.cache, cache_max_entries=args.cache_max_entries,
+        resume=args.resume, incremental=args.incremental, profile_path=args.profile, redact_output=args.redact,
+        force_thr=args.force_thr, scores_out=args.scores_out, shards=args.shards,
+        xlsx_cache=args.xlsx_cache, cascade=args.cascade,
+    )
+
+
 if __name__ == "__main__":
     raise SystemExit(main())
@@ -3,53 +3,249 @@ from __future__ import annotations
 import argparse
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 
+from ..io.load_data import iter_frames, read_frame, table_columns
+from ..utils.topk import TopK
 
-def main() -> int:
-    ap = argparse.ArgumentParser(description="Relatório rápido das predições (sem ground-truth).")
-    ap.add_argument("--preds", required=True, help="CSV gerado pelo predict.py")
-    ap.add_argument("--top", type=int, default=15, help="Quantidade de exemplos para mostrar")
-    args = ap.parse_args()
+REPORT_COLUMNS = ["id", "pred_label", "pred_score", "has_cpf", "has_email", "has_phone", "decided_by"]
+SIGNAL_COLUMNS = ["has_cpf", "has_email", "has_phone"]
+EXAMPLE_COLUMNS = ["id", "pred_score", "pred_label"]
+
+# Saída do predict_hybrid --cascade: só os registros com decided_by == "ml" têm pred_score;
+# nos demais ele fica vazio e sai das estatísticas, dos buckets e dos exemplos.
+DECIDED_COLUMN = "decided_by"
+
+# Distribuição simples por faixas
+BUCKET_BINS = [-0.001, 0.05, 0.15, 0.25, 0.35, 0.5, 0.75, 1.0]
+BUCKET_LABELS = ["<=0.05", "0.05-0.15", "0.15-0.25", "0.25-0.35", "0.35-0.50", "0.50-0.75", "0.75-1.0"]
+
+# Resolução do histograma usado para os quantis no modo em streaming (erro <= 1/QUANTILE_BINS).
+QUANTILE_BINS = 100_000
+
+
+def _ranked(df: pd.DataFrame) -> pd.DataFrame:
+    if DECIDED_COLUMN in df.columns:
+        return df[df[DECIDED_COLUMN] == "ml"]
+    return df
+
+
+def _scored(df: pd.DataFrame) -> pd.DataFrame:
+    """Esvazia o pred_score dos registros do --cascade decididos sem o modelo.
 
-    df = pd.read_csv(args.preds)
+    Saídas antigas do --cascade gravavam ali só a parte do regex; o predict_hybrid atual
+    já grava vazio.
+    """
+    if DECIDED_COLUMN in df.columns:
+        df = df.copy()
+        df.loc[df[DECIDED_COLUMN] != "ml", "pred_score"] = np.nan
+    return df
 
+
+def _border_mask(scores: pd.Series, thr: float) -> pd.Series:
+    return (scores >= thr - 0.05) & (scores < thr + 0.05)
+
+
+def _print_report(
+    n: int,
+    label_counts: pd.Series,
+    describe: pd.Series,
+    buckets: pd.Series,
+    signals: dict | None,
+    top: pd.DataFrame,
+    border: pd.DataFrame,
+    thr: float,
+    cascade: bool = False,
+) -> None:
     print("\n=== Visão geral ===")
-    print("linhas:", len(df))
-    print("pred_label counts:\n", df["pred_label"].value_counts(dropna=False))
+    print("linhas:", n)
+    print("pred_label counts:\n", label_counts)
 
     print("\n=== Estatísticas de score ===")
-    print(df["pred_score"].describe())
+    print(describe)
 
-    # Distribuição simples por faixas
-    bins = [-0.001, 0.05, 0.15, 0.25, 0.35, 0.5, 0.75, 1.0]
-    labels = ["<=0.05", "0.05-0.15", "0.15-0.25", "0.25-0.35", "0.35-0.50", "0.50-0.75", "0.75-1.0"]
-    df["score_bucket"] = pd.cut(df["pred_score"], bins=bins, labels=labels)
     print("\n=== Buckets de score ===")
-    print(df["score_bucket"].value_counts().sort_index())
+    print(buckets)
 
     # Quais sinais estão gerando positivos
-    if {"has_cpf", "has_email", "has_phone"}.issubset(df.columns):
+    if signals is not None:
         print("\n=== Positivos por sinal (apenas pred_label=1) ===")
-        pos = df[df["pred_label"] == 1]
-        if len(pos) == 0:
+        if signals["pos"] == 0:
             print("Nenhum positivo com o threshold atual.")
         else:
-            print("pos total:", len(pos))
-            print("has_cpf:", int(pos["has_cpf"].sum()))
-            print("has_email:", int(pos["has_email"].sum()))
-            print("has_phone:", int(pos["has_phone"].sum()))
+            print("pos total:", signals["pos"])
+            for c in SIGNAL_COLUMNS:
+                print(f"{c}:", signals[c])
 
     # Top scores (prováveis PII)
+    if cascade:
+        print(f"\n(saída do --cascade: exemplos só entre registros com {DECIDED_COLUMN}=ml)")
     print("\n=== Top scores ===")
-    print(df.sort_values("pred_score", ascending=False).head(args.top)[["id", "pred_score", "pred_label"]])
+    print(top)
 
-    # Borderline (perto do threshold 0.35 por padrão)
-    thr = 0.35
-    border = df[(df["pred_score"] >= thr - 0.05) & (df["pred_score"] < thr + 0.05)]
+    # Borderline (perto do threshold)
     print(f"\n=== Borderline (score em [{thr-0.05:.2f}, {thr+0.05:.2f})) ===")
-    print(border.sort_values("pred_score", ascending=False).head(args.top)[["id", "pred_score", "pred_label"]])
+    print(border)
+
+
+def report_in_memory(df: pd.DataFrame, top: int, thr: float) -> None:
+    df = _scored(df).copy()
+    df["score_bucket"] = pd.cut(df["pred_score"], bins=BUCKET_BINS, labels=BUCKET_LABELS)
+    signals = None
+    if set(SIGNAL_COLUMNS).issubset(df.columns):
+        pos = df[df["pred_label"] == 1]
+        signals = {"pos": len(pos), **{c: int(pos[c].sum()) for c in SIGNAL_COLUMNS}}
+    ranked = _ranked(df)
+    border = ranked[_border_mask(ranked["pred_score"], thr)]
+    _print_report(
+        len(df),
+        df["pred_label"].value_counts(dropna=False),
+        df["pred_score"].describe(),
+        df["score_bucket"].value_counts().sort_index(),
+        signals,
+        ranked.sort_values("pred_score", ascending=False).head(top)[EXAMPLE_COLUMNS],
+        border.sort_values("pred_score", ascending=False).head(top)[EXAMPLE_COLUMNS],
+        thr,
+        DECIDED_COLUMN in df.columns,
+    )
+
+
+class StreamingReport:
+    """Agregados do relatório numa passada, com memória limitada.
+
+    Contagens, buckets, soma e pos por sinal são exatos; média e desvio-padrão usam a
+    combinação de Chan (exata a menos de arredondamento); os quantis saem de um
+    histograma fino em [0, 1] (erro <= 1/QUANTILE_BINS, limitado por min/max); top-N e
+    borderline vêm de heaps de tamanho `top`.
+    """
+
+    def __init__(self, top: int, thr: float):
+        self.thr = thr
+        self.n = 0
+        self.label_counts = pd.Series(dtype="int64")
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = float("inf")
+        self.max = float("-inf")
+        self.hist = np.zeros(QUANTILE_BINS, dtype=np.int64)
+        self.buckets = np.zeros(len(BUCKET_LABELS), dtype=np.int64)
+        self.signals: dict | None = None
+        self.top = TopK(top)
+        self.border = TopK(top)
+        self.cascade = False
+
+    def add(self, df: pd.DataFrame) -> None:
+        if df.empty:
+            return
+        df = _scored(df).set_axis(pd.RangeIndex(self.n, self.n + len(df)))
+        s = df["pred_score"].to_numpy(dtype=float)
+        valid = s[~np.isnan(s)]
+
+        self.label_counts = self.label_counts.add(df["pred_label"].value_counts(dropna=False), fill_value=0)
+
+        if len(valid):
+            m = len(valid)
+            prev = self.n_valid
+            mean_b = float(valid.mean())
+            delta = mean_b - self.mean
+            tot = prev + m
+            self.m2 += float(((valid - mean_b) ** 2).sum()) + delta * delta * prev * m / tot
+            self.mean += delta * m / tot
+            self.min = min(self.min, float(valid.min()))
+            self.max = max(self.max, float(valid.max()))
+            idx = np.clip((valid * QUANTILE_BINS).astype(np.int64), 0, QUANTILE_BINS - 1)
+            self.hist += np.bincount(idx, minlength=QUANTILE_BINS)
+
+        codes = pd.cut(df["pred_score"], bins=BUCKET_BINS, labels=False)
+        codes = codes[codes.notna()].astype(np.int64)
+        self.buckets += np.bincount(codes, minlength=len(BUCKET_LABELS))
+
+        if set(SIGNAL_COLUMNS).issubset(df.columns):
+            pos = df[df["pred_label"] == 1]
+            if self.signals is None:
+                self.signals = {"pos": 0, **{c: 0 for c in SIGNAL_COLUMNS}}
+            self.signals["pos"] += len(pos)
+            for c in SIGNAL_COLUMNS:
+                self.signals[c] += int(pos[c].sum())
+
+        self.cascade = self.cascade or DECIDED_COLUMN in df.columns
+        ex = _ranked(df)[EXAMPLE_COLUMNS].reset_index()
+        self.top.push_frame(ex)
+        self.border.push_frame(ex[_border_mask(ex["pred_score"], self.thr)])
+        self.n += len(df)
+
+    @property
+    def n_valid(self) -> int:
+        return int(self.hist.sum())
+
+    def _quantile(self, q: float) -> float:
+        # mesma interpolação linear do pandas, sobre a posição q*(n-1) no histograma
+        n = self.n_valid
+        pos = q * (n - 1)
+        cum = np.cumsum(self.hist)
+
+        def value_at(rank: int) -> float:
+            b = int(np.searchsorted(cum, rank + 1))
+            lo = cum[b - 1] if b else 0
+            # posição dentro da célula, assumindo valores uniformes nela
+            v = (b + (rank - lo + 0.5) / self.hist[b]) / QUANTILE_BINS
+            return min(max(v, self.min), self.max)
+
+        lo_rank = int(np.floor(pos))
+        hi_rank = min(lo_rank + 1, n - 1)
+        frac = pos - lo_rank
+        return value_at(lo_rank) + (value_at(hi_rank) - value_at(lo_rank)) * frac
+
+    def describe(self) -> pd.Series:
+        n = self.n_valid
+        if n == 0:
+            values = [0.0] + [np.nan] * 7
+        else:
+            std = float(np.sqrt(self.m2 / (n - 1))) if n > 1 else np.nan
+            values = [float(n), self.mean, std, self.min,
+                      self._quantile(0.25), self._quantile(0.5), self._quantile(0.75), self.max]
+        return pd.Series(values, index=["count", "mean", "std", "min", "25%", "50%", "75%", "max"], name="pred_score")
+
+    def print(self) -> None:
+        labels = self.label_counts.astype("int64").sort_values(ascending=False, kind="stable")
+        labels.index.name = "pred_label"
+        labels.name = "count"
+        buckets = pd.Series(
+            self.buckets,
+            index=pd.CategoricalIndex(BUCKET_LABELS, categories=BUCKET_LABELS, ordered=True, name="score_bucket"),
+            name="count",
+        )
+
+        def examples(topk: TopK) -> pd.DataFrame:
+            if len(topk) == 0:
+                return pd.DataFrame(columns=EXAMPLE_COLUMNS)
+            return topk.to_frame().set_index("index").rename_axis(None)
+
+        _print_report(self.n, labels, self.describe(), buckets, self.signals,
+                      examples(self.top), examples(self.border), self.thr, self.cascade)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Relatório rápido das predições (sem ground-truth).")
+    ap.add_argument("--preds", required=True, help="Saída do predict.py/predict_hybrid.py (.csv/.parquet/.arrow)")
+    ap.add_argument("--top", type=int, default=15, help="Quantidade de exemplos para mostrar")
+    ap.add_argument("--border_thr", type=float, default=0.35, help="Centro da faixa borderline ([thr-0.05, thr+0.05))")
+    ap.add_argument("--chunk_size", "--chunk-size", dest="chunk_size", type=int, default=0,
+                    help="Lê em lotes deste tamanho, numa passada com memória limitada (quantis aproximados); 0 = tudo em memória")
+    args = ap.parse_args()
+
+    path = Path(args.preds)
+    cols = table_columns(path)
+    usecols = [c for c in REPORT_COLUMNS if c in cols]
 
+    if args.chunk_size > 0:
+        report = StreamingReport(args.top, args.border_thr)
+        for df in iter_frames(path, args.chunk_size, usecols):
+            report.add(df)
+        report.print()
+    else:
+        report_in_memory(read_frame(path, usecols), args.top, args.border_thr)
     return 0
 
 
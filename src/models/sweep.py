@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+from typing import List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from ..utils.metrics import precision_recall_f1
+
+# O sweep reproduz exatamente a decisão do predict_hybrid:
+#   score = alpha * ml_score + (1 - alpha) * regex_score
+#   pred_label = (score >= threshold) | (regex_score >= force_thr)
+# sem rodar o modelo de novo, a partir dos scores gravados com --scores-out.
+
+
+class ScoreRecorder:
+    """Acumula id/ml_score/regex_score lote a lote (predict_hybrid --scores-out)."""
+
+    def __init__(self):
+        self._ids: List[np.ndarray] = []
+        self._ml: List[np.ndarray] = []
+        self._rx: List[np.ndarray] = []
+
+    def add(self, df: pd.DataFrame) -> None:
+        self._ids.append(df["id"].astype(str).to_numpy())
+        self._ml.append(df["ml_score"].to_numpy(dtype=float))
+        self._rx.append(df["regex_score"].to_numpy(dtype=float))
+
+    def __len__(self) -> int:
+        return sum(len(a) for a in self._ml)
+
+    def save(self, path: Path) -> None:
+        def cat(parts, dtype):
+            return np.concatenate(parts).astype(dtype) if parts else np.zeros(0, dtype=dtype)
+
+        with Path(path).open("wb") as f:
+            np.savez(f, id=cat(self._ids, str), ml_score=cat(self._ml, float), regex_score=cat(self._rx, float))
+
+
+def load_scores(path: Path) -> dict:
+    with np.load(path) as z:
+        return {k: z[k] for k in ("id", "ml_score", "regex_score")}
+
+
+def parse_grid(spec: str) -> np.ndarray:
+    """"0.3,0.5,0.7" ou "início:fim:passo" (fim incluso)."""
+    if ":" in spec:
+        start, stop, step = (float(v) for v in spec.split(":"))
+        values = np.arange(start, stop + step / 2, step)
+    else:
+        values = np.array([float(v) for v in spec.split(",") if v.strip()])
+    # arredonda para casar com o float digitado na CLI (0.1 * 3 -> 0.3, não 0.30000000000000004)
+    return np.unique(np.round(values, 10))
+
+
+def sweep(
+    ml_score: np.ndarray,
+    regex_score: np.ndarray,
+    alphas: Sequence[float],
+    thresholds: Sequence[float],
+    force_thrs: Sequence[float],
+    y: np.ndarray | None = None,
+) -> pd.DataFrame:
+    """Avalia a grade alpha x threshold x force_thr inteira; uma linha por combinação.
+
+    O regex_score tem poucos valores distintos (somas dos pesos), então as linhas são
+    agrupadas por (regex_score, rótulo). Dentro de um grupo o regex_score é constante
+    e o score final é monótono no ml_score: uma única ordenação vale para todo alpha, e
+    cada grupo conta "score >= t" para todos os thresholds com um searchsorted. A
+    decisão de forçar depende só do grupo.
+    """
+    thresholds = np.asarray(thresholds, dtype=float)
+    force_thrs = np.asarray(force_thrs, dtype=float)
+    alphas = np.asarray(alphas, dtype=float)
+    bad = alphas[~((alphas >= 0) & (alphas <= 1))]  # pega NaN também
+    if len(bad):
+        raise ValueError(f"alpha deve estar em [0, 1]: {bad.tolist()}")
+    has_labels = y is not None
+    y = np.asarray(y, dtype=np.int64) if has_labels else np.zeros(len(ml_score), dtype=np.int64)
+
+    rx_values, grp = np.unique(regex_score, return_inverse=True)
+    key = grp * 2 + y
+    order = np.lexsort((ml_score, key))
+    ml_sorted, rx_sorted = ml_score[order], regex_score[order]
+    sizes = np.bincount(key, minlength=2 * len(rx_values))
+    bounds = np.concatenate([[0], np.cumsum(sizes)])
+    forced_g = (rx_values[None, :] >= force_thrs[:, None]).astype(np.int64)  # (F, G)
+    forced_rows = forced_g @ sizes.reshape(-1, 2)  # (F, 2): forçados por rótulo
+    n_forced = forced_rows.sum(axis=1)
+
+    frames = []
+    for a in alphas:
+        # mesma expressão do predict_hybrid; arredondamento monótono mantém cada grupo ordenado
+        s_sorted = a * ml_sorted + (1.0 - a) * rx_sorted
+        ge = np.empty((len(sizes), len(thresholds)), dtype=np.int64)
+        for k in range(len(sizes)):
+            seg = s_sorted[bounds[k]:bounds[k + 1]]
+            ge[k] = len(seg) - np.searchsorted(seg, thresholds, side="left")
+        ge = ge.reshape(len(rx_values), 2, len(thresholds))
+        # positivos previstos, por (force_thr, rótulo, threshold)
+        pos = forced_rows[:, :, None] + np.einsum("fg,gyt->fyt", 1 - forced_g, ge)
+
+        F, T = len(force_thrs), len(thresholds)
+        n_pred = pos.sum(axis=1)
+        frame = {
+            "alpha": np.full(F * T, a),
+            "threshold": np.tile(thresholds, F),
+            "force_thr": np.repeat(force_thrs, T),
+            "n_pos": n_pred.ravel(),
+            "n_neg": len(ml_score) - n_pred.ravel(),
+            "pos_rate": n_pred.ravel() / max(len(ml_score), 1),
+            "n_forced": np.repeat(n_forced, T),
+        }
+        if has_labels:
+            tp = pos[:, 1, :].ravel()
+            fp = pos[:, 0, :].ravel()
+            fn = int(y.sum()) - tp
+            precision, recall, f1 = precision_recall_f1(tp, fp, fn)
+            frame.update({"tp": tp, "fp": fp, "fn": fn, "precision": precision, "recall": recall, "f1": f1})
+        frames.append(pd.DataFrame(frame))
+    return pd.concat(frames, ignore_index=True)
+
+
+def _load_labels(path: Path, ids: np.ndarray, label_col: str) -> np.ndarray:
+    from ..io.load_data import read_frame
+
+    df = read_frame(path, ["id", label_col])
+    labels = pd.Series(df[label_col].to_numpy(), index=df["id"].astype(str))
+    labels = labels[~labels.index.duplicated()]
+    y = labels.reindex(ids)
+    missing = int(y.isna().sum())
+    if missing:
+        raise SystemExit(f"{missing} ids dos scores não têm rótulo em {path}.")
+    return y.astype(int).to_numpy()
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Sweep vetorizado de alpha/threshold/force_thr sobre scores gravados.")
+    ap.add_argument("--scores", required=True, help="Arquivo .npz do predict_hybrid --scores-out")
+    ap.add_argument("--labels", default=None, help="Tabela com id + rótulo (ex.: dataset sintético) para P/R/F1")
+    ap.add_argument("--label-col", default="label", help="Coluna de rótulo em --labels")
+    ap.add_argument("--alphas", default="0:1:0.05", help='Grade de alpha: "a,b,c" ou "início:fim:passo"')
+    ap.add_argument("--thresholds", default="0.05:0.95:0.05", help="Grade de threshold")
+    ap.add_argument("--force-thrs", default="0.25,0.35,0.45,1.01", help="Grade de force_thr (acima de 1 = nunca força)")
+    ap.add_argument("--out", default=None, help="Grava a tabela completa (.csv/.parquet/.arrow)")
+    ap.add_argument("--top", type=int, default=15, help="Quantas combinações mostrar")
+    args = ap.parse_args(argv)
+
+    scores = load_scores(Path(args.scores))
+    y = _load_labels(Path(args.labels), scores["id"], args.label_col) if args.labels else None
+    alphas, thresholds, force_thrs = parse_grid(args.alphas), parse_grid(args.thresholds), parse_grid(args.force_thrs)
+
+    t0 = time.perf_counter()
+    try:
+        df = sweep(scores["ml_score"], scores["regex_score"], alphas, thresholds, force_thrs, y)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    elapsed = time.perf_counter() - t0
+    print(f"OK: {len(df)} combinações sobre {len(scores['ml_score'])} linhas em {elapsed:.2f}s")
+
+    if args.out:
+        from ..io.writers import write_frame
+
+        Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+        write_frame(df, Path(args.out))
+        print(f"OK: sweep salvo em {args.out}")
+
+    with pd.option_context("display.width", 160, "display.max_columns", 20):
+        if y is not None:
+            print(f"\n=== Melhores por F1 (positivos reais: {int(y.sum())} de {len(y)}) ===")
+            print(df.sort_values(["f1", "precision"], ascending=False).head(args.top).to_string(index=False))
+        else:
+            print("\n=== Distribuição de rótulos por combinação ===")
+            print(df.head(args.top).to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
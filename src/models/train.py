@@ -11,7 +11,7 @@ from sklearn.linear_model import LogisticRegression
 from sklearn.model_selection import train_test_split
 
 from ..config import Defaults
-from ..io.load_data import load_records
+from ..io.load_data import load_batch
 
 SYNTH_EMAILS = ["maria.silva@email.com", "joao.souza@exemplo.com"]
 SYNTH_CPFS = ["123.456.789-10", "98765432100"]
@@ -36,8 +36,7 @@ def main() -> int:
     rng = random.Random(args.seed)
     np.random.seed(args.seed)
 
-    records = load_records(Path(args.input))
-    texts = [r.text for r in records]
+    texts = load_batch(Path(args.input)).texts
     if not texts:
         raise SystemExit("Dataset vazio.")
 
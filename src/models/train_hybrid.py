@@ -1,86 +1,337 @@
 from __future__ import annotations
 
 import argparse
+import copy
+import os
+import shutil
 from pathlib import Path
 
 import joblib
 import numpy as np
-import pandas as pd
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import classification_report
 from sklearn.model_selection import train_test_split
-from scipy.sparse import hstack, csr_matrix
+from scipy.sparse import hstack, csr_matrix, load_npz, save_npz
 
 from ..config import Defaults
+from ..features.matrix import regex_feature_matrix
+from ..features.regex_features import REGEX_FEATURE_COLS
+from ..io.load_data import iter_frames, read_frame, table_columns
+from ..utils.cache import cache_fingerprint
+from ..utils.metrics import precision_recall_f1
+from ..utils.profiling import NULL_PROFILER, Profiler
+from .linear_scorer import export_linear
+from .make_synth_dataset import source_id
 
+VAL_FRACTION = 0.25
+VECTORIZER_PARAMS = {"ngram_range": (1, 2), "min_df": 2, "max_df": 0.95}
 
-REGEX_FEATURE_COLS = [
-    "has_cpf",
-    "has_email",
-    "has_phone",
-    "has_rg",
-    "has_zip",
-    "injected_count",
-]
 
+def _is_val(row_idx: np.ndarray, seed: int) -> np.ndarray:
+    """Split treino/validação por hash do índice do registro de origem: independe do tamanho do chunk."""
+    h = (row_idx.astype(np.uint64) * np.uint64(2654435761) + np.uint64(seed)) % np.uint64(2**32)
+    return h < np.uint64(int(VAL_FRACTION * 2**32))
 
-def main() -> int:
-    ap = argparse.ArgumentParser(description="Treina modelo híbrido: TF-IDF + features regex numéricas.")
-    ap.add_argument("--synth_csv", required=True, help="CSV rotulado gerado pelo make_synth_dataset")
-    ap.add_argument("--model_out", default="artifacts/models/hybrid_tfidf_logreg.joblib")
-    ap.add_argument("--seed", type=int, default=Defaults.seed)
-    ap.add_argument("--C", type=float, default=2.0, help="Regularização do LogisticRegression (maior = menos regularização)")
-    args = ap.parse_args()
 
-    df = pd.read_csv(args.synth_csv)
-    if df.empty:
-        raise SystemExit("Dataset sintético vazio.")
+def _source_index(ids, start: int = 0, prev: str | None = None) -> tuple:
+    """Índice do registro de origem de cada linha e o último id de origem visto.
+
+    As variantes <id>-v<n> de um registro são contíguas no make_synth_dataset, então
+    basta contar as trocas de id de origem; sem variantes, é o próprio índice da linha.
+    """
+    src = [source_id(str(r)) for r in ids]
+    new = np.fromiter((s != p for s, p in zip(src, [prev] + src[:-1])), dtype=bool, count=len(src))
+    return start - 1 + np.cumsum(new), (src[-1] if src else prev)
+
+
+def _rows_of(src: np.ndarray, chosen: np.ndarray, n_src: int) -> np.ndarray:
+    """Linhas dos registros de origem `chosen`, na ordem de `chosen`."""
+    rank = np.full(n_src, -1)
+    rank[chosen] = np.arange(len(chosen))
+    r = rank[src]
+    rows = np.flatnonzero(r >= 0)
+    return rows[np.argsort(r[rows], kind="stable")]
+
+
+SYNTH_COLUMNS = ["id", "text", "label", "injected_count"]
 
-    # garante colunas
-    for c in REGEX_FEATURE_COLS + ["text", "label"]:
-        if c not in df.columns:
+
+def _check_columns(path: str) -> None:
+    cols = table_columns(Path(path))
+    for c in SYNTH_COLUMNS:
+        if c not in cols:
             raise SystemExit(f"Coluna ausente no synth_csv: {c}")
 
+
+def _iter_synth_chunks(path: str, chunk_size: int):
+    """Lê o dataset sintético em chunks; devolve (índices globais de origem, textos, X_num, y)."""
+    n_src, prev = 0, None
+    for df in iter_frames(Path(path), chunk_size, SYNTH_COLUMNS):
+        texts = df["text"].astype(str).tolist()
+        X_num, _ = regex_feature_matrix(
+            texts, REGEX_FEATURE_COLS, extra={"injected_count": df["injected_count"].fillna(0).to_numpy()}
+        )
+        idx, prev = _source_index(df["id"], n_src, prev)
+        n_src = int(idx[-1]) + 1 if len(idx) else n_src
+        yield idx, texts, X_num, df["label"].astype(int).to_numpy()
+
+
+def _train_out_of_core(args, profiler: Profiler = NULL_PROFILER):
+    """Treino em streaming: HashingVectorizer (+ IDF opcional) e SGD logístico com partial_fit.
+
+    A memória fica limitada pelo chunk e por n_features; a validação guarda só rótulos
+    e predições (int8) para o classification_report.
+    """
+    from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+    from sklearn.linear_model import SGDClassifier
+    from sklearn.pipeline import make_pipeline
+
+    _check_columns(args.synth_csv)
+    hasher = HashingVectorizer(ngram_range=(1, 2), n_features=args.n_features, alternate_sign=False, norm=None)
+    tfidf = TfidfTransformer(use_idf=args.idf).fit(csr_matrix((1, args.n_features)))
+
+    if args.idf:
+        # passada extra só para a frequência de documentos (mesma fórmula suavizada do TfidfVectorizer)
+        doc_freq = np.zeros(args.n_features, dtype=np.int64)
+        n_docs = 0
+        with profiler.stage("idf_pass"):
+            for idx, texts, _, _ in _iter_synth_chunks(args.synth_csv, args.chunk_size):
+                train = ~_is_val(idx, args.seed)
+                X = hasher.transform([t for t, m in zip(texts, train) if m])
+                doc_freq += np.bincount(X.indices, minlength=args.n_features)
+                n_docs += X.shape[0]
+        tfidf.idf_ = np.log((1 + n_docs) / (1 + doc_freq)) + 1.0
+    vec = make_pipeline(hasher, tfidf)
+
+    clf = SGDClassifier(loss="log_loss", alpha=args.sgd_alpha, random_state=args.seed)
+    n_train = 0
+    for epoch in range(args.epochs):
+        for idx, texts, X_num, y in profiler.iter("read_chunks", _iter_synth_chunks(args.synth_csv, args.chunk_size)):
+            train = ~_is_val(idx, args.seed)
+            if not train.any():
+                continue
+            with profiler.stage("vectorize", int(train.sum())):
+                X = hstack([vec.transform([t for t, m in zip(texts, train) if m]), csr_matrix(X_num[train])])
+            with profiler.stage("partial_fit", int(train.sum())):
+                clf.partial_fit(X, y[train], classes=np.array([0, 1]))
+            if epoch == 0:
+                n_train += int(train.sum())
+    if n_train == 0:
+        raise SystemExit("Dataset sintético vazio.")
+
+    profiler.count("train_rows", n_train)
+
+    yva, preds, probs = [], [], []
+    for idx, texts, X_num, y in profiler.iter("read_chunks", _iter_synth_chunks(args.synth_csv, args.chunk_size)):
+        val = _is_val(idx, args.seed)
+        if not val.any():
+            continue
+        with profiler.stage("vectorize", int(val.sum())):
+            X = hstack([vec.transform([t for t, m in zip(texts, val) if m]), csr_matrix(X_num[val])])
+        with profiler.stage("predict_val", int(val.sum())):
+            p = clf.predict_proba(X)[:, 1]
+        yva.append(y[val].astype(np.int8))
+        preds.append(clf.predict(X).astype(np.int8))
+        probs.append((float(p.min()), float(p.sum()), float(p.max()), len(p)))
+
+    return vec, clf, np.concatenate(yva), np.concatenate(preds), probs
+
+
+def _build_features(synth_csv: str, seed: int, profiler: Profiler = NULL_PROFILER):
+    """Lê o dataset, separa treino/validação e devolve (vetorizador, Xtr, Xva, ytr, yva)."""
+    with profiler.stage("read"):
+        _check_columns(synth_csv)
+        df = read_frame(Path(synth_csv), SYNTH_COLUMNS)
+    if df.empty:
+        raise SystemExit("Dataset sintético vazio.")
+
     X_text = df["text"].astype(str).tolist()
     y = df["label"].astype(int).values
 
-    # features numéricas (regex)
-    X_num = df[REGEX_FEATURE_COLS].fillna(0).astype(float).values
+    # features numéricas (regex), pelo mesmo builder usado na inferência;
+    # injected_count só existe no sintético e vem do CSV
+    with profiler.stage("regex_features", len(X_text)):
+        X_num, _ = regex_feature_matrix(
+            X_text, REGEX_FEATURE_COLS, extra={"injected_count": df["injected_count"].fillna(0).to_numpy()}
+        )
     X_num = csr_matrix(X_num)
 
-    Xtr_text, Xva_text, Xtr_num, Xva_num, ytr, yva = train_test_split(
-        X_text, X_num, y, test_size=0.25, random_state=args.seed, stratify=y
+    # split por registro de origem (estratificado pelo rótulo mais alto das suas linhas):
+    # as variantes de um registro nunca ficam dos dois lados
+    src, _ = _source_index(df["id"])
+    n_src = int(src[-1]) + 1
+    src_label = np.zeros(n_src, dtype=int)
+    np.maximum.at(src_label, src, y)
+    tr_src, va_src = train_test_split(
+        np.arange(n_src), test_size=VAL_FRACTION, random_state=seed, stratify=src_label
     )
+    tr, va = _rows_of(src, tr_src, n_src), _rows_of(src, va_src, n_src)
+    Xtr_text, Xva_text = [X_text[i] for i in tr], [X_text[i] for i in va]
+    Xtr_num, Xva_num, ytr, yva = X_num[tr], X_num[va], y[tr], y[va]
 
-    vec = TfidfVectorizer(ngram_range=(1, 2), min_df=2, max_df=0.95)
-    Xtr_tfidf = vec.fit_transform(Xtr_text)
-    Xva_tfidf = vec.transform(Xva_text)
+    vec = TfidfVectorizer(**VECTORIZER_PARAMS)
+    with profiler.stage("tfidf_fit_transform", len(Xtr_text)):
+        Xtr_tfidf = vec.fit_transform(Xtr_text)
+    with profiler.stage("tfidf_transform", len(Xva_text)):
+        Xva_tfidf = vec.transform(Xva_text)
 
     # concatena TF-IDF + numéricas
-    Xtr = hstack([Xtr_tfidf, Xtr_num])
-    Xva = hstack([Xva_tfidf, Xva_num])
+    with profiler.stage("hstack", len(X_text)):
+        Xtr = hstack([Xtr_tfidf, Xtr_num], format="csr")
+        Xva = hstack([Xva_tfidf, Xva_num], format="csr")
+    return vec, Xtr, Xva, ytr, yva
+
+
+def _load_features(synth_csv: str, seed: int, cache_dir: str | None, profiler: Profiler = NULL_PROFILER):
+    """_build_features com cache em disco (--feature_cache).
+
+    A chave cobre o conteúdo do dataset, a semente do split, os parâmetros do
+    vetorizador, as regras de regex e o gazetteer de nomes (via cache_fingerprint);
+    qualquer mudança gera uma entrada nova.
+    """
+    if not cache_dir:
+        return _build_features(synth_csv, seed, profiler)
+
+    with profiler.stage("cache_key"):
+        key = cache_fingerprint(
+            "train_features", model=Path(synth_csv), seed=seed, val_fraction=VAL_FRACTION, split="source",
+            vectorizer=VECTORIZER_PARAMS, regex_feature_cols=REGEX_FEATURE_COLS,
+        )
+    entry = Path(cache_dir) / key
+    if entry.is_dir():
+        with profiler.stage("cache_load"):
+            vec = joblib.load(entry / "vectorizer.joblib")
+            Xtr, Xva = load_npz(entry / "Xtr.npz"), load_npz(entry / "Xva.npz")
+            ytr, yva = np.load(entry / "ytr.npy"), np.load(entry / "yva.npy")
+        print(f"OK: features do cache {entry}")
+        return vec, Xtr, Xva, ytr, yva
+
+    vec, Xtr, Xva, ytr, yva = _build_features(synth_csv, seed, profiler)
+    with profiler.stage("cache_save"):
+        tmp = entry.with_name(entry.name + f".tmp{os.getpid()}")
+        tmp.mkdir(parents=True, exist_ok=True)
+        joblib.dump(vec, tmp / "vectorizer.joblib")
+        save_npz(tmp / "Xtr.npz", Xtr, compressed=False)
+        save_npz(tmp / "Xva.npz", Xva, compressed=False)
+        np.save(tmp / "ytr.npy", ytr)
+        np.save(tmp / "yva.npy", yva)
+        try:
+            os.replace(tmp, entry)
+        except OSError:  # outra execução gravou a mesma entrada antes
+            shutil.rmtree(tmp, ignore_errors=True)
+    print(f"OK: features salvas no cache {entry}")
+    return vec, Xtr, Xva, ytr, yva
+
+
+def _fit_path(Xtr, ytr, Xva, yva, grid):
+    """Ajusta C em ordem crescente com warm_start: cada ajuste parte dos coeficientes do anterior."""
+    clf = LogisticRegression(max_iter=400, warm_start=True)
+    out = []
+    for c in grid:
+        clf.set_params(C=c)
+        clf.fit(Xtr, ytr)
+        pred = clf.predict(Xva)
+        tp = int(((pred == 1) & (yva == 1)).sum())
+        fp = int(((pred == 1) & (yva == 0)).sum())
+        fn = int(((pred == 0) & (yva == 1)).sum())
+        out.append((c, copy.deepcopy(clf).set_params(warm_start=False), precision_recall_f1(tp, fp, fn)))
+    return out
+
+
+def _search_C(Xtr, ytr, Xva, yva, grid, n_jobs: int = 1):
+    """Avalia a grade de C; com n_jobs > 1 divide o caminho em trechos contíguos, um por processo."""
+    n_jobs = max(1, min(int(n_jobs) if n_jobs > 0 else (os.cpu_count() or 1), len(grid)))
+    if n_jobs == 1:
+        return _fit_path(Xtr, ytr, Xva, yva, grid)
+    from joblib import Parallel, delayed
 
-    clf = LogisticRegression(max_iter=400, C=args.C)
-    clf.fit(Xtr, ytr)
+    parts = [list(p) for p in np.array_split(np.asarray(grid), n_jobs)]
+    results = Parallel(n_jobs=n_jobs)(delayed(_fit_path)(Xtr, ytr, Xva, yva, p) for p in parts)
+    return [r for part in results for r in part]
 
-    preds = clf.predict(Xva)
-    probs = clf.predict_proba(Xva)[:, 1]
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Treina modelo híbrido: TF-IDF + features regex numéricas.")
+    ap.add_argument("--synth_csv", required=True, help="Dataset rotulado gerado pelo make_synth_dataset (.csv/.parquet/.arrow)")
+    ap.add_argument("--model_out", default="artifacts/models/hybrid_tfidf_logreg.joblib")
+    ap.add_argument("--seed", type=int, default=Defaults.seed)
+    ap.add_argument("--C", type=float, default=2.0, help="Regularização do LogisticRegression (maior = menos regularização)")
+    ap.add_argument("--linear_out", default=None, help="Exporta também o artefato linear compilado neste diretório")
+    ap.add_argument("--out_of_core", action="store_true",
+                    help="Treino em streaming (HashingVectorizer + SGD com partial_fit), memória limitada pelo chunk")
+    ap.add_argument("--chunk_size", type=int, default=Defaults.chunk_size, help="Linhas por chunk no modo --out_of_core")
+    ap.add_argument("--n_features", type=int, default=2**20, help="Dimensão do HashingVectorizer (--out_of_core)")
+    ap.add_argument("--idf", action="store_true", help="Passada extra de IDF em streaming (--out_of_core)")
+    ap.add_argument("--epochs", type=int, default=5, help="Passadas de partial_fit sobre o treino (--out_of_core)")
+    ap.add_argument("--sgd_alpha", type=float, default=1e-5, help="Regularização do SGDClassifier (--out_of_core)")
+    ap.add_argument("--feature_cache", default=None,
+                    help="Diretório de cache do vetorizador e das matrizes treino/val (.npz), por dataset/seed/parâmetros")
+    ap.add_argument("--C_grid", default=None,
+                    help="Lista de C (ex.: 0.25,0.5,1,2,4,8): busca com warm start e salva só o melhor por F1 de validação")
+    ap.add_argument("--n_jobs", type=int, default=1, help="Processos para a busca de C (0 = todos os núcleos)")
+    ap.add_argument("--profile", default=None, help="Grava relatório JSON de tempo/memória por estágio")
+    args = ap.parse_args()
+
+    profiler = Profiler("train_hybrid", enabled=bool(args.profile))
+    if args.out_of_core:
+        if args.linear_out:
+            raise SystemExit("--linear_out não é suportado com --out_of_core (vetorizador por hashing).")
+        vec, clf, yva, preds, prob_parts = _train_out_of_core(args, profiler)
+        print("\n=== CLASSIFICATION REPORT (val) ===")
+        print(classification_report(yva, preds, digits=4))
+        with profiler.stage("dump"):
+            joblib.dump({"vectorizer": vec, "model": clf, "regex_feature_cols": REGEX_FEATURE_COLS}, args.model_out)
+        print(f"OK: modelo híbrido salvo em {args.model_out}")
+        n_val = sum(p[3] for p in prob_parts)
+        print("prob stats:", min(p[0] for p in prob_parts), sum(p[1] for p in prob_parts) / n_val, max(p[2] for p in prob_parts))
+        profiler.count("val_rows", n_val)
+        if args.profile:
+            profiler.write(args.profile)
+        return 0
+
+    vec, Xtr, Xva, ytr, yva = _load_features(args.synth_csv, args.seed, args.feature_cache, profiler)
+
+    if args.C_grid:
+        grid = sorted(float(c) for c in args.C_grid.split(",") if c.strip())
+        with profiler.stage("c_search", len(ytr) * len(grid)):
+            results = _search_C(Xtr, ytr, Xva, yva, grid, args.n_jobs)
+        print("\n=== Busca de C (val) ===")
+        for c, _, (p, r, f1) in results:
+            print(f"C={c:<8g} precision={p:.4f} recall={r:.4f} f1={f1:.4f}")
+        best = max(results, key=lambda t: t[2][2])  # empate: o primeiro (menor C)
+        clf = best[1]
+        print(f"melhor C: {best[0]:g}")
+    else:
+        clf = LogisticRegression(max_iter=400, C=args.C)
+        with profiler.stage("fit", len(ytr)):
+            clf.fit(Xtr, ytr)
+
+    with profiler.stage("predict_val", len(yva)):
+        preds = clf.predict(Xva)
+        probs = clf.predict_proba(Xva)[:, 1]
+    profiler.count("train_rows", len(ytr))
+    profiler.count("val_rows", len(yva))
 
     print("\n=== CLASSIFICATION REPORT (val) ===")
     print(classification_report(yva, preds, digits=4))
 
     # salva artefato completo
-    joblib.dump(
-        {
-            "vectorizer": vec,
-            "model": clf,
-            "regex_feature_cols": REGEX_FEATURE_COLS,
-        },
-        args.model_out,
-    )
+    bundle = {
+        "vectorizer": vec,
+        "model": clf,
+        "regex_feature_cols": REGEX_FEATURE_COLS,
+    }
+    with profiler.stage("dump"):
+        joblib.dump(bundle, args.model_out)
     print(f"OK: modelo híbrido salvo em {args.model_out}")
+    if args.linear_out:
+        with profiler.stage("export_linear"):
+            export_linear(bundle, Path(args.linear_out))
+        print(f"OK: artefato linear salvo em {args.linear_out}")
     print("prob stats:", float(np.min(probs)), float(np.mean(probs)), float(np.max(probs)))
+    if args.profile:
+        profiler.write(args.profile)
     return 0
 
 
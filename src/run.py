@@ -1,12 +1,30 @@
 from __future__ import annotations
 
 import argparse
-import subprocess
 from pathlib import Path
-import sys
 
+# Os módulos de predição são importados só dentro de cada modo: o modo regex
+# nunca carrega sklearn/scipy/joblib.
 
-def main() -> int:
+
+def _run_regex(args) -> int:
+    from .models.predict import run
+
+    return run(Path(args.input), args.output, threshold=args.threshold, workers=args.workers, cache_path=args.cache,
+               profile_path=args.profile, redact_output=args.redact, xlsx_cache=args.xlsx_cache)
+
+
+def _run_hybrid(args, model_path: Path) -> int:
+    from .models.predict_hybrid import run
+
+    return run(
+        Path(args.input), str(model_path), args.output,
+        alpha=args.alpha, threshold=args.threshold, workers=args.workers, cache_path=args.cache,
+        profile_path=args.profile, redact_output=args.redact, xlsx_cache=args.xlsx_cache,
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
     ap = argparse.ArgumentParser(description="Runner único (baseline ou híbrido).")
     ap.add_argument("--input", required=True, help="Entrada (.xlsx/.csv/.jsonl)")
     ap.add_argument("--output", required=True, help="Saída (.csv)")
@@ -14,37 +32,26 @@ def main() -> int:
     ap.add_argument("--mode", choices=["auto", "regex", "hybrid"], default="auto")
     ap.add_argument("--alpha", type=float, default=0.45)
     ap.add_argument("--threshold", type=float, default=0.25)
-    args = ap.parse_args()
+    ap.add_argument("--workers", type=int, default=1, help="Processos para extração de regex (0 = todos os núcleos)")
+    ap.add_argument("--cache", default=None, help="Cache SQLite de scores por texto (opcional)")
+    ap.add_argument("--profile", default=None, help="Grava relatório JSON de tempo/memória por estágio")
+    ap.add_argument("--redact", action="store_true", help="Inclui redacted_text com os dados pessoais mascarados")
+    ap.add_argument("--xlsx-cache", action="store_true", help="Para .xlsx: lê de uma cópia .arrow guardada ao lado da planilha (refeita se o arquivo mudar)")
+    args = ap.parse_args(argv)
 
     model_path = Path(args.model)
 
     if args.mode == "regex":
-        cmd = [sys.executable, "-m", "src.models.predict", "--input", args.input, "--output", args.output, "--threshold", str(args.threshold)]
-        return subprocess.call(cmd)
+        return _run_regex(args)
 
     if args.mode == "hybrid":
-        cmd = [
-            sys.executable, "-m", "src.models.predict_hybrid",
-            "--input", args.input, "--model", str(model_path),
-            "--output", args.output,
-            "--alpha", str(args.alpha),
-            "--threshold", str(args.threshold),
-        ]
-        return subprocess.call(cmd)
+        return _run_hybrid(args, model_path)
 
     # auto
     if model_path.exists():
-        cmd = [
-            sys.executable, "-m", "src.models.predict_hybrid",
-            "--input", args.input, "--model", str(model_path),
-            "--output", args.output,
-            "--alpha", str(args.alpha),
-            "--threshold", str(args.threshold),
-        ]
-        return subprocess.call(cmd)
-
-    cmd = [sys.executable, "-m", "src.models.predict", "--input", args.input, "--output", args.output, "--threshold", str(args.threshold)]
-    return subprocess.call(cmd)
+        return _run_hybrid(args, model_path)
+
+    return _run_regex(args)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import argparse
+import json
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+import numpy as np
+
+from .models.predict_hybrid import REGEX_FORCE_THR, load_bundle, score_texts
+
+# Campos devolvidos por registro (mesmos nomes da saída do predict_hybrid).
+RESPONSE_FIELDS = ("id", "pred_label", "pred_score", "ml_score", "regex_score", "forced_by_regex")
+
+
+class MicroBatcher:
+    """Agrupa requisições concorrentes numa única chamada de score_texts.
+
+    Uma thread consome a fila: pega o primeiro item, espera até `max_wait_ms` por
+    outros (ou até `max_batch` registros) e pontua tudo de uma vez. Sob carga baixa a
+    espera termina cedo porque a fila esvazia; sob carga alta os lotes crescem.
+    """
+
+    def __init__(self, bundle: dict, alpha: float, threshold: float, regex_force_thr: float,
+                 max_batch: int = 256, max_wait_ms: float = 2.0, latency_window: int = 10_000):
+        self.bundle = bundle
+        self.alpha = alpha
+        self.threshold = threshold
+        self.regex_force_thr = regex_force_thr
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: "queue.Queue[tuple[list, list, Future, float]]" = queue.Queue()
+        self._latencies: deque = deque(maxlen=latency_window)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.records = 0
+        self.batches = 0
+        threading.Thread(target=self._loop, name="micro-batcher", daemon=True).start()
+
+    def submit(self, ids: List[str], texts: List[str]) -> Future:
+        fut: Future = Future()
+        self._queue.put((ids, texts, fut, time.perf_counter()))
+        return fut
+
+    def _loop(self) -> None:
+        while True:
+            pending = [self._queue.get()]
+            n = len(pending[0][0])
+            deadline = time.perf_counter() + self.max_wait
+            while n < self.max_batch:
+                try:
+                    item = self._queue.get(timeout=max(deadline - time.perf_counter(), 0.0))
+                except queue.Empty:
+                    break
+                pending.append(item)
+                n += len(item[0])
+            self._run(pending)
+
+    def _run(self, pending: list) -> None:
+        ids = [i for p in pending for i in p[0]]
+        texts = [t for p in pending for t in p[1]]
+        try:
+            df = score_texts(self.bundle, ids, texts, self.alpha, self.threshold, self.regex_force_thr)
+            rows = df[list(RESPONSE_FIELDS)].to_dict("records")
+        except Exception as exc:  # devolve o erro a todos os clientes do lote
+            for p in pending:
+                p[2].set_exception(exc)
+            return
+
+        now = time.perf_counter()
+        start = 0
+        for p_ids, _, fut, t0 in pending:
+            fut.set_result(rows[start:start + len(p_ids)])
+            start += len(p_ids)
+        with self._lock:
+            self._latencies.extend(now - p[3] for p in pending)
+            self.requests += len(pending)
+            self.records += len(ids)
+            self.batches += 1
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._latencies.clear()
+            self.requests = self.records = self.batches = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lat = np.array(self._latencies, dtype=float) * 1000.0
+            out = {"requests": self.requests, "records": self.records, "batches": self.batches}
+        out["mean_batch_records"] = out["records"] / out["batches"] if out["batches"] else 0.0
+        if len(lat):
+            out["latency_ms"] = {
+                "p50": float(np.percentile(lat, 50)),
+                "p99": float(np.percentile(lat, 99)),
+                "max": float(lat.max()),
+                "window": int(len(lat)),
+            }
+        return out
+
+
+def _parse_records(payload) -> tuple[List[str], List[str]]:
+    """Aceita {"id":..., "text":...}, uma lista desses, ou {"records": [...]}."""
+    if isinstance(payload, dict) and "records" in payload:
+        payload = payload["records"]
+    if isinstance(payload, dict):
+        payload = [payload]
+    if not isinstance(payload, list):
+        raise ValueError("JSON deve ser um registro, uma lista de registros ou {'records': [...]}")
+    ids, texts = [], []
+    for i, rec in enumerate(payload):
+        if not isinstance(rec, dict) or "text" not in rec:
+            raise ValueError(f"registro {i} sem campo 'text'")
+        ids.append(str(rec.get("id", i)))
+        texts.append("" if rec["text"] is None else str(rec["text"]))
+    return ids, texts
+
+
+class ScoringServer(ThreadingHTTPServer):
+    # o padrão do socketserver (fila de 5 conexões) derruba clientes justamente sob a
+    # carga concorrente que o micro-lote existe para absorver
+    request_queue_size = 128
+    daemon_threads = True
+
+
+def make_handler(batcher: MicroBatcher):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, code: int, body) -> None:
+            data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/stats":
+                self._send(200, batcher.stats())
+            elif self.path == "/health":
+                self._send(200, {"status": "ok"})
+            else:
+                self._send(404, {"error": "rota desconhecida"})
+
+        def do_POST(self):
+            if self.path != "/score":
+                self._send(404, {"error": "rota desconhecida"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                ids, texts = _parse_records(json.loads(self.rfile.read(length) or b"null"))
+            except ValueError as exc:
+                self._send(400, {"error": str(exc)})
+                return
+            if not ids:
+                self._send(200, [])
+                return
+            try:
+                self._send(200, batcher.submit(ids, texts).result())
+            except Exception as exc:
+                self._send(500, {"error": str(exc)})
+
+        def log_message(self, format, *args):  # silencia o log por requisição
+            pass
+
+    return Handler
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Servidor local de scoring híbrido (modelo carregado uma única vez).")
+    ap.add_argument("--model", default="artifacts/models/hybrid_tfidf_logreg.joblib", help="Modelo híbrido .joblib ou diretório do artefato linear")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--alpha", type=float, default=0.70, help="Peso do ML no score final (0..1)")
+    ap.add_argument("--threshold", type=float, default=0.30, help="Threshold para pred_label (0/1)")
+    ap.add_argument("--force-thr", type=float, default=REGEX_FORCE_THR,
+                    help="regex_score a partir do qual o rótulo é forçado a 1 (como no predict_hybrid)")
+    ap.add_argument("--backlog", type=int, default=ScoringServer.request_queue_size,
+                    help="Fila de conexões pendentes do socket (listen)")
+    ap.add_argument("--max-batch", type=int, default=256, help="Máximo de registros por micro-lote")
+    ap.add_argument("--max-wait-ms", type=float, default=2.0, help="Espera máxima para juntar requisições num lote")
+    args = ap.parse_args()
+
+    bundle = load_bundle(args.model)
+    batcher = MicroBatcher(bundle, args.alpha, args.threshold, args.force_thr,
+                           max_batch=args.max_batch, max_wait_ms=args.max_wait_ms)
+    # aquece o vetorizador/modelo antes de aceitar conexões (fora das estatísticas)
+    batcher.submit(["warmup"], [""]).result()
+    batcher.reset_stats()
+
+    server = ScoringServer((args.host, args.port), make_handler(batcher), bind_and_activate=False)
+    server.request_queue_size = args.backlog
+    try:
+        server.server_bind()
+        server.server_activate()
+    except Exception:
+        server.server_close()
+        raise
+    print(f"OK: servindo {args.model} em http://{args.host}:{args.port} (POST /score, GET /stats)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print("stats:", json.dumps(batcher.stats()))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from ..features.names import GAZETTEER_PATH
+from ..features.regex_features import REGEX_VERSION
+
+
+def file_digest(path: Path) -> str:
+    """sha256 de um arquivo (ou de todos os arquivos de um diretório, em ordem)."""
+    path = Path(path)
+    files = sorted(p for p in path.rglob("*") if p.is_file()) if path.is_dir() else [path]
+    h = hashlib.sha256()
+    for f in files:
+        h.update(f.name.encode("utf-8"))
+        with f.open("rb") as fh:
+            for block in iter(lambda: fh.read(1 << 20), b""):
+                h.update(block)
+    return h.hexdigest()
+
+
+def cache_fingerprint(kind: str, model: Path | None = None, **params) -> str:
+    """Identifica modelo + configuração: mudou qualquer coisa, as entradas antigas não valem.
+
+    Inclui o digest do gazetteer de nomes: editar names_br.txt invalida o cache mesmo sem
+    subir REGEX_VERSION.
+    """
+    payload = {
+        "kind": kind,
+        "regex_version": REGEX_VERSION,
+        "names": file_digest(GAZETTEER_PATH),
+        "model": file_digest(model) if model is not None else None,
+        "params": params,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()[:32]
+
+
+def text_key(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+class ScoreCache:
+    """Cache em disco (SQLite) de resultados por texto, endereçado por conteúdo.
+
+    Chave = (fingerprint do modelo/config, hash do texto). Ao fechar, mantém só as
+    `max_entries` entradas usadas mais recentemente.
+    """
+
+    def __init__(self, path: Path, fingerprint: str, max_entries: int = 1_000_000):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.fingerprint = fingerprint
+        self.max_entries = max_entries
+        self.rows = 0
+        self.hits = 0
+        self.misses = 0
+        self._now = time.time_ns()
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS scores ("
+            " fp TEXT NOT NULL, key BLOB NOT NULL, value TEXT NOT NULL, last_used INTEGER NOT NULL,"
+            " PRIMARY KEY (fp, key)) WITHOUT ROWID"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS scores_last_used ON scores (last_used)")
+
+    def get_many(self, keys: Sequence[bytes]) -> Dict[bytes, list]:
+        found: Dict[bytes, list] = {}
+        for i in range(0, len(keys), 500):  # limite de parâmetros do SQLite
+            part = list(keys[i:i + 500])
+            marks = ",".join("?" * len(part))
+            rows = self._conn.execute(
+                f"SELECT key, value FROM scores WHERE fp = ? AND key IN ({marks})", [self.fingerprint, *part]
+            ).fetchall()
+            found.update((k, json.loads(v)) for k, v in rows)
+        if found:
+            self._conn.executemany(
+                "UPDATE scores SET last_used = ? WHERE fp = ? AND key = ?",
+                [(self._now, self.fingerprint, k) for k in found],
+            )
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items: Dict[bytes, list]) -> None:
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO scores (fp, key, value, last_used) VALUES (?, ?, ?, ?)",
+            [(self.fingerprint, k, json.dumps(v), self._now) for k, v in items.items()],
+        )
+        self._conn.commit()
+
+    def evict(self) -> int:
+        """Remove as entradas menos usadas além de max_entries; devolve quantas saíram."""
+        (total,) = self._conn.execute("SELECT COUNT(*) FROM scores").fetchone()
+        excess = total - self.max_entries
+        if excess <= 0:
+            return 0
+        self._conn.execute(
+            "DELETE FROM scores WHERE (fp, key) IN (SELECT fp, key FROM scores ORDER BY last_used LIMIT ?)", (excess,)
+        )
+        self._conn.commit()
+        return excess
+
+    def close(self) -> None:
+        self.evict()
+        self._conn.commit()
+        self._conn.close()
+
+    def summary(self) -> str:
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0.0
+        return (
+            f"cache: {self.rows} linhas, {total} textos distintos | "
+            f"{self.hits} hits / {self.misses} misses ({rate:.1%}) em {self.path}"
+        )
+
+
+def dedup_apply(
+    texts: Sequence[str],
+    compute: Callable[[List[str]], pd.DataFrame],
+    columns: Sequence[str],
+    cache: ScoreCache | None = None,
+) -> pd.DataFrame:
+    """Aplica `compute` só aos textos distintos (e ainda não cacheados) do lote.
+
+    `compute` recebe uma lista de textos e devolve um DataFrame com `columns`, na mesma
+    ordem; o resultado volta alinhado a `texts` (duplicatas recebem a mesma linha).
+    """
+    index: Dict[str, int] = {}
+    inverse = np.fromiter((index.setdefault(t, len(index)) for t in texts), dtype=np.int64, count=len(texts))
+    uniq = list(index)
+
+    values: List[list | None] = [None] * len(uniq)
+    todo = list(range(len(uniq)))
+    keys: List[bytes] = []
+    if cache is not None:
+        cache.rows += len(texts)
+        keys = [text_key(t) for t in uniq]
+        found = cache.get_many(keys)
+        todo = []
+        for i, k in enumerate(keys):
+            if k in found:
+                values[i] = found[k]
+            else:
+                todo.append(i)
+
+    if todo:
+        computed = compute([uniq[i] for i in todo])[list(columns)]
+        rows = computed.itertuples(index=False, name=None)
+        fresh = {}
+        for i, row in zip(todo, rows):
+            row = [v.item() if isinstance(v, np.generic) else v for v in row]
+            values[i] = row
+            if cache is not None:
+                fresh[keys[i]] = row
+        if fresh:
+            cache.put_many(fresh)
+
+    uniq_df = pd.DataFrame.from_records(values, columns=list(columns))
+    return uniq_df.iloc[inverse].reset_index(drop=True)
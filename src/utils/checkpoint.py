@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Set
+
+import pandas as pd
+
+
+def read_output_ids(path: Path) -> Set[str]:
+    """Ids já presentes num CSV de saída (lê só a coluna id)."""
+    path = Path(path)
+    if not path.exists() or path.stat().st_size == 0:
+        return set()
+    ids = pd.read_csv(path, usecols=["id"], dtype={"id": str}, keep_default_na=False)["id"]
+    return set(ids.tolist())
+
+
+def read_output_header(path: Path) -> list[str]:
+    with Path(path).open("r", encoding="utf-8") as f:
+        return f.readline().rstrip("\r\n").split(",")
+
+
+def file_identity(path: Path) -> dict:
+    """Caminho absoluto + tamanho + mtime: outra grafia do mesmo arquivo é a mesma entrada, um arquivo alterado não.
+
+    Para um diretório (artefato linear), soma os tamanhos e usa o mtime mais recente.
+    """
+    path = Path(path).resolve()
+    files = [p for p in path.rglob("*") if p.is_file()] if path.is_dir() else [path]
+    stats = [f.stat() for f in files]
+    return {
+        "path": str(path),
+        "size": sum(st.st_size for st in stats),
+        "mtime_ns": max((st.st_mtime_ns for st in stats), default=0),
+    }
+
+
+class Checkpoint:
+    """Estado de uma execução em lotes, gravado ao lado da saída (`<saida>.ckpt`).
+
+    Depois de cada lote gravado (e sincronizado em disco) o estado guarda o tamanho
+    válido da saída. Na retomada, qualquer resto de um lote interrompido é truncado e
+    os ids já presentes na saída são pulados.
+    """
+
+    def __init__(self, output: Path, run_meta: dict):
+        self.output = Path(output)
+        self.path = self.output.with_name(self.output.name + ".ckpt")
+        self.run_meta = run_meta
+        self.rows = 0
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def restore(self) -> Set[str]:
+        state = json.loads(self.path.read_text(encoding="utf-8"))
+        if state["run"] != self.run_meta:
+            diff = sorted(k for k in state["run"].keys() | self.run_meta.keys()
+                          if state["run"].get(k) != self.run_meta.get(k))
+            raise SystemExit(
+                f"Checkpoint {self.path} é de outra execução (muda: {', '.join(diff)}); "
+                "apague-o ou rode sem --resume."
+            )
+        if not self.output.exists():
+            raise SystemExit(f"Checkpoint encontrado, mas a saída {self.output} não existe.")
+        with self.output.open("r+b") as f:
+            f.truncate(state["offset"])
+        self.rows = state["rows"]
+        return read_output_ids(self.output)
+
+    def commit(self, new_rows: int) -> None:
+        self.rows += new_rows
+        state = {"run": self.run_meta, "offset": self.output.stat().st_size, "rows": self.rows}
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(state), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def finish(self) -> None:
+        self.path.unlink(missing_ok=True)
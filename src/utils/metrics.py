@@ -1,7 +1,27 @@
 from __future__ import annotations
 
-def precision_recall_f1(tp: int, fp: int, fn: int) -> tuple[float, float, float]:
-    precision = tp / (tp + fp) if (tp + fp) else 0.0
-    recall = tp / (tp + fn) if (tp + fn) else 0.0
-    f1 = (2 * precision * recall / (precision + recall)) if (precision + recall) else 0.0
+import numpy as np
+
+
+def _safe_div(num: np.ndarray, den: np.ndarray) -> np.ndarray:
+    out = np.zeros(np.broadcast(num, den).shape, dtype=float)
+    np.divide(num, den, out=out, where=den != 0)
+    return out
+
+
+def precision_recall_f1(tp, fp, fn):
+    """Precisão, recall e F1 (0.0 quando indefinidos).
+
+    Com contagens escalares devolve floats; com arrays (ex.: uma grade de thresholds)
+    devolve arrays elemento a elemento, com os mesmos valores.
+    """
+    if np.ndim(tp) == 0 and np.ndim(fp) == 0 and np.ndim(fn) == 0:
+        precision = tp / (tp + fp) if (tp + fp) else 0.0
+        recall = tp / (tp + fn) if (tp + fn) else 0.0
+        f1 = (2 * precision * recall / (precision + recall)) if (precision + recall) else 0.0
+        return precision, recall, f1
+    tp, fp, fn = (np.asarray(v, dtype=float) for v in (tp, fp, fn))
+    precision = _safe_div(tp, tp + fp)
+    recall = _safe_div(tp, tp + fn)
+    f1 = _safe_div(2 * precision * recall, precision + recall)
     return precision, recall, f1
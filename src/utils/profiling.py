@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import json
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+_NULL = nullcontext()
+
+
+def peak_rss_mb() -> float:
+    """Pico de RSS do processo (VmHWM no Linux; ru_maxrss como alternativa)."""
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:  # Windows
+        return float("nan")
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024.0 * 1024.0) if sys.platform == "darwin" else rss / 1024.0
+
+
+def reset_peak_rss() -> None:
+    # Linux >= 4.0: zera o VmHWM para medir o pico de cada estágio (no-op fora do Linux)
+    try:
+        with open("/proc/self/clear_refs", "w", encoding="ascii") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+class Profiler:
+    """Cronômetros por estágio (tempo, linhas, pico de RSS) com relatório em JSON.
+
+    Desligado, `stage()` devolve um contexto nulo compartilhado: o custo é uma chamada.
+    Estágios com o mesmo nome acumulam (ex.: um por chunk).
+    """
+
+    def __init__(self, entry_point: str = "", enabled: bool = True):
+        self.entry_point = entry_point
+        self.enabled = enabled
+        self.stages: Dict[str, dict] = {}
+        self.counts: Dict[str, int] = {}
+        self._t0 = time.perf_counter()
+
+    def stage(self, name: str, rows: int | None = None):
+        if not self.enabled:
+            return _NULL
+        return self._stage(name, rows)
+
+    @contextmanager
+    def _stage(self, name: str, rows: int | None) -> Iterator[None]:
+        reset_peak_rss()
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._add(name, time.perf_counter() - t0, rows)
+
+    def _add(self, name: str, seconds: float, rows: int | None) -> None:
+        st = self.stages.setdefault(name, {"seconds": 0.0, "calls": 0, "rows": 0, "peak_rss_mb": 0.0})
+        st["seconds"] += seconds
+        st["calls"] += 1
+        st["rows"] += rows or 0
+        st["peak_rss_mb"] = max(st["peak_rss_mb"], peak_rss_mb())
+
+    def iter(self, name: str, iterable: Iterable[T]) -> Iterator[T]:
+        """Mede o tempo gasto produzindo cada item (ex.: leitura de chunks)."""
+        if not self.enabled:
+            yield from iterable
+            return
+        it = iter(iterable)
+        while True:
+            reset_peak_rss()
+            t0 = time.perf_counter()
+            try:
+                item = next(it)
+            except StopIteration:
+                return
+            self._add(name, time.perf_counter() - t0, len(item) if hasattr(item, "__len__") else None)
+            yield item
+
+    def count(self, name: str, n: int) -> None:
+        if self.enabled:
+            self.counts[name] = self.counts.get(name, 0) + int(n)
+
+    def report(self) -> dict:
+        stages = {}
+        for name, st in self.stages.items():
+            rps = st["rows"] / st["seconds"] if st["rows"] and st["seconds"] > 0 else None
+            stages[name] = dict(st, rows_per_s=rps)
+        return {
+            "entry_point": self.entry_point,
+            "total_seconds": time.perf_counter() - self._t0,
+            "peak_rss_mb": max((st["peak_rss_mb"] for st in self.stages.values()), default=peak_rss_mb()),
+            "counts": dict(self.counts),
+            "stages": stages,
+        }
+
+    def write(self, path: str | Path) -> None:
+        if not self.enabled:
+            return
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.report(), indent=2), encoding="utf-8")
+        print(f"OK: perfil salvo em {path}")
+
+
+NULL_PROFILER = Profiler(enabled=False)
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import heapq
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class TopK:
+    """Mantém as k linhas de maior score vistas em lotes, com memória O(k).
+
+    Empates são resolvidos pela ordem de chegada (a primeira vista fica na frente).
+    """
+
+    def __init__(self, k: int, score_col: str = "pred_score"):
+        self.k = int(k)
+        self.score_col = score_col
+        self._heap: List[Tuple[float, int, tuple]] = []
+        self._offset = 0
+        self._columns: list | None = None
+
+    def push_frame(self, df: pd.DataFrame) -> None:
+        if self.k <= 0 or df.empty:
+            return
+        if self._columns is None:
+            self._columns = list(df.columns)
+        scores = df[self.score_col].to_numpy(dtype=float)
+        # pré-seleção vetorizada: só linhas com score >= k-ésimo maior do lote podem entrar
+        if len(scores) > self.k:
+            kth = np.partition(scores, len(scores) - self.k)[len(scores) - self.k]
+            cand = np.flatnonzero(scores >= kth)
+        else:
+            cand = np.arange(len(scores))
+        base = self._offset
+        self._offset += len(scores)
+        rows = df.iloc[cand].itertuples(index=False, name=None)
+        for pos, row in zip(cand, rows):
+            # seq negativo: no min-heap, o mais antigo entre empatados é o último a sair
+            item = (float(scores[pos]), -(base + int(pos)), row)
+            if len(self._heap) < self.k:
+                heapq.heappush(self._heap, item)
+            elif item[:2] > self._heap[0][:2]:
+                heapq.heapreplace(self._heap, item)
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def to_frame(self) -> pd.DataFrame:
+        items = sorted(self._heap, key=lambda it: it[:2], reverse=True)
+        return pd.DataFrame([it[2] for it in items], columns=self._columns)
@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+import pandas as pd
+import pytest
+
+from src.bench.suite import _quick_model, generate_corpus
+
+
+@pytest.fixture(scope="session")
+def tiny_corpus(tmp_path_factory):
+    """Corpus e-SIC sintético pequeno (com PII injetada), gerado uma vez por sessão."""
+    return generate_corpus(tmp_path_factory.mktemp("corpus") / "corpus.csv", 600, 0.4, 8, 40, seed=7)
+
+
+@pytest.fixture(scope="session")
+def tiny_bundle(tiny_corpus):
+    """Bundle híbrido (TF-IDF (1, 2) + LogisticRegression) treinado no tiny_corpus."""
+    return _quick_model(tiny_corpus, 600, seed=7)
+
+
+@pytest.fixture(scope="session")
+def tiny_texts(tiny_corpus):
+    return pd.read_csv(tiny_corpus)["Texto Mascarado"].astype(str).tolist()
@@ -0,0 +1,14 @@
+from __future__ import annotations
+
+from src.utils import cache
+from src.utils.cache import cache_fingerprint
+
+
+def test_fingerprint_follows_gazetteer(tmp_path, monkeypatch):
+    gaz = tmp_path / "names_br.txt"
+    gaz.write_text("[primeiros]\nMaria\n[sobrenomes]\nSilva\n", encoding="utf-8")
+    monkeypatch.setattr(cache, "GAZETTEER_PATH", gaz)
+    before = cache_fingerprint("train_features", seed=42)
+    assert cache_fingerprint("train_features", seed=42) == before
+    gaz.write_text("[primeiros]\nMaria\n[sobrenomes]\nSilva\nSouza\n", encoding="utf-8")
+    assert cache_fingerprint("train_features", seed=42) != before
@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from src.models.predict_hybrid import DECIDED_COLUMN, score_texts
+
+
+@pytest.mark.parametrize("alpha, threshold", [(0.7, 0.3), (0.3, 0.2), (0.1, 0.05)])
+def test_cascade_labels_match_and_decided_rows_have_no_score(tiny_bundle, tiny_texts, alpha, threshold):
+    ids = [str(i) for i in range(len(tiny_texts))]
+    full = score_texts(tiny_bundle, ids, tiny_texts, alpha, threshold)
+    cascade = score_texts(tiny_bundle, ids, tiny_texts, alpha, threshold, cascade=True)
+
+    assert (full["pred_label"].to_numpy() == cascade["pred_label"].to_numpy()).all()
+    assert (full["regex_score"].to_numpy() == cascade["regex_score"].to_numpy()).all()
+
+    decided = (cascade[DECIDED_COLUMN] != "ml").to_numpy()
+    assert decided.any() and not decided.all()
+    assert cascade.loc[decided, ["pred_score", "ml_score"]].isna().all().all()
+    np.testing.assert_array_equal(cascade.loc[~decided, "pred_score"], full.loc[~decided, "pred_score"])
+    np.testing.assert_array_equal(cascade.loc[~decided, "ml_score"], full.loc[~decided, "ml_score"])
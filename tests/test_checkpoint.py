@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import pytest
+
+from src.utils.checkpoint import Checkpoint, file_identity
+
+
+def _meta(input_path, model_path) -> dict:
+    return {"input": file_identity(input_path), "model": file_identity(model_path), "alpha": 0.7, "threshold": 0.3}
+
+
+@pytest.fixture
+def interrupted(tmp_path, monkeypatch):
+    """Entrada, modelo e uma saída com checkpoint de um lote, gravados por caminho relativo."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "in.csv").write_text("id,texto\n1,a\n2,b\n", encoding="utf-8")
+    (tmp_path / "model.joblib").write_bytes(b"modelo")
+    out = tmp_path / "preds.csv"
+    out.write_text("id,pred_label\n1,0\n", encoding="utf-8")
+    Checkpoint(out, _meta("in.csv", "model.joblib")).commit(1)
+    return tmp_path, out
+
+
+def test_same_files_other_spelling_resumes(interrupted):
+    tmp_path, out = interrupted
+    meta = _meta(tmp_path / "sub" / ".." / "in.csv", tmp_path / "model.joblib")
+    assert Checkpoint(out, meta).restore() == {"1"}
+
+
+@pytest.mark.parametrize("changed, key", [("in.csv", "input"), ("model.joblib", "model")])
+def test_changed_file_is_refused(interrupted, changed, key):
+    tmp_path, out = interrupted
+    with (tmp_path / changed).open("a", encoding="utf-8") as f:
+        f.write("3,c\n")
+    with pytest.raises(SystemExit, match=f"muda: {key}"):
+        Checkpoint(out, _meta("in.csv", "model.joblib")).restore()
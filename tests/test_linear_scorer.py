@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.sparse import csr_matrix, hstack
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+
+from src.features.matrix import regex_feature_matrix
+from src.features.regex_features import REGEX_FEATURE_COLS
+from src.models.linear_scorer import LinearScorer, export_linear
+
+# norm == 0 é tratado à parte no scorer: texto vazio, só pontuação e só termos fora do vocabulário
+EDGE_TEXTS = ["", "   ", "?!.,", "xyzzyq plughzz frobnicatezz", "CPF 123.456.789-10 xyzzyq"]
+
+
+@pytest.mark.parametrize("ngram_range", [(1, 1), (1, 2)])
+@pytest.mark.parametrize("sublinear_tf", [False, True])
+def test_predict_ml_matches_sklearn(tiny_corpus, tiny_texts, tmp_path, ngram_range, sublinear_tf):
+    y = pd.read_csv(tiny_corpus)["label"].to_numpy()
+    X_num, _ = regex_feature_matrix(tiny_texts, REGEX_FEATURE_COLS)
+    vec = TfidfVectorizer(ngram_range=ngram_range, min_df=2, max_df=0.95, sublinear_tf=sublinear_tf)
+    clf = LogisticRegression(max_iter=400, C=2.0).fit(hstack([vec.fit_transform(tiny_texts), csr_matrix(X_num)]), y)
+    bundle = {"vectorizer": vec, "model": clf, "regex_feature_cols": REGEX_FEATURE_COLS}
+    scorer = LinearScorer(export_linear(bundle, tmp_path / "linear"))
+
+    texts = tiny_texts[:200] + EDGE_TEXTS
+    X_num, _ = regex_feature_matrix(texts, REGEX_FEATURE_COLS)
+    ref = clf.predict_proba(hstack([vec.transform(texts), csr_matrix(X_num)]))[:, 1]
+    got = scorer.predict_ml(texts, X_num)
+    assert np.max(np.abs(ref - got)) <= 1e-9
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from src.bench.loader import legacy_load, projected_load
+from src.io import load_data
+
+
+def _write_jsonl(path, rows):
+    path.write_text("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in rows), encoding="utf-8")
+    return path
+
+
+@pytest.mark.parametrize("first", [
+    {"texto": "sem id no primeiro registro"},
+    {"protocolo": "P0"},
+    {"orgao": "SEEDF"},
+])
+def test_sparse_first_jsonl_record(tmp_path, first):
+    rows = [first] + [{"protocolo": f"P{i}", "orgao": "SEEDF", "texto": f"pedido {i}"} for i in range(1, 5)]
+    path = _write_jsonl(tmp_path / "sparse.jsonl", rows)
+    ids, texts = projected_load(path)
+    assert (ids, texts) == legacy_load(path)
+    assert ids[1:] == ["P1", "P2", "P3", "P4"]
+
+
+def test_key_beyond_sample_triggers_full_scan(tmp_path, monkeypatch):
+    monkeypatch.setattr(load_data, "JSONL_SCHEMA_SAMPLE", 2)
+    rows = [{"texto": "a"}, {"texto": "b"}, {"protocolo": "P2", "texto": "c"}]
+    path = _write_jsonl(tmp_path / "late_id.jsonl", rows)
+    assert load_data.table_columns(path) == ["texto", "protocolo"]
+    assert projected_load(path) == legacy_load(path)
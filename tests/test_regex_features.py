@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import pytest
+
+from src.bench.regex_scan import _PARITY_KEYS, legacy_regex_signals, make_texts
+from src.features.regex_features import REDACT_TYPES, SIGNAL_KEYS, redact, scan_signals, scan_spans
+
+# Casos de fronteira do scanner de passada única: textos sem gatilho, só "@",
+# e o (?<!\w...) que substituiu o \b inicial dos padrões numéricos.
+EDGE_CASES = [
+    "",
+    "Pedido de informação sobre obras na escola",
+    "SOLICITO CÓPIA DO CONTRATO DA SECRETARIA",
+    "contato @ secretaria",
+    "@@@",
+    "email: a@b",
+    "maria.silva@email.com",
+    "MARIA.SILVA@EMAIL.COM e joao@exemplo.com.br",
+    "CPF 123.456.789-10",
+    "CPF:12345678910.",
+    "x123.456.789-10",
+    "_123.456.789-10",
+    "A123.456.789-10",
+    "123.456.789-10a",
+    "1234.567.891-01",
+    "CEP 70000-000 e 70000000",
+    "x70000-000",
+    "RG 12.345.678-9 ou 1.234.567-X",
+    "ab1.234.567-X",
+    "Telefone: (61) 91234-5678 / +55 61 3456-7890 / 61987654321",
+    "ramal 3456-7890x",
+    "ano 2023, art. 5º da Lei 12.527",
+    "processo 00040-00012345/2024-11",
+    "ção123.456.789-10",
+    "é70000-000",
+]
+
+
+def _corpus() -> list[str]:
+    texts = EDGE_CASES + make_texts(300, 30, 0.5, seed=7) + make_texts(20, 400, 0.5, seed=8)
+    return [v for t in texts for v in (t, t.lower(), t.upper(), "X" + t.replace(" ", ""))]
+
+
+CORPUS = _corpus()
+
+
+@pytest.mark.parametrize("text", EDGE_CASES)
+def test_edge_cases_match_legacy(text):
+    new = dict(zip(SIGNAL_KEYS, scan_signals(text)))
+    old = legacy_regex_signals(text)
+    assert {k: new[k] for k in _PARITY_KEYS} == {k: old[k] for k in _PARITY_KEYS}
+
+
+def test_scan_signals_matches_legacy():
+    bad = []
+    for t in CORPUS:
+        new = dict(zip(SIGNAL_KEYS, scan_signals(t)))
+        old = legacy_regex_signals(t)
+        if any(new[k] != old[k] for k in _PARITY_KEYS):
+            bad.append(t)
+    assert not bad, bad[:5]
+
+
+def test_scan_spans_signals_match_scan_signals():
+    for t in CORPUS:
+        signals, spans = scan_spans(t)
+        assert signals == scan_signals(t), t
+        assert spans == sorted(spans, key=lambda s: (s[1], -s[2]))
+        counts = {kind: sum(1 for s in spans if s[0] == kind) for kind in ("email", "cpf", "phone", "name")}
+        sig = dict(zip(SIGNAL_KEYS, signals))
+        assert counts["email"] == sig["email_count"]
+        assert counts["cpf"] == sig["cpf_count"]
+        assert counts["phone"] == sig["phone_count"]
+        assert counts["name"] == sig["name_count"]
+
+
+def _redacted(text: str, **kw) -> str:
+    return redact(text, scan_spans(text)[1], **kw)
+
+
+def test_redact_without_match_returns_text():
+    for t in ["", "Pedido de informação sobre obras na escola", "ano 2023, art. 5º da Lei 12.527"]:
+        assert _redacted(t) == t
+
+
+def test_redact_multiple_pii_in_one_text():
+    text = "CPF 123.456.789-10, e-mail maria.silva@email.com, CEP 70000-000, RG 12.345.678-9 e tel (61) 91234-5678."
+    out = _redacted(text)
+    assert out.startswith("CPF [CPF], e-mail [EMAIL], CEP [ZIP], RG [RG] e tel ")
+    assert out.endswith("[PHONE].")
+    for pii in ("123.456.789-10", "maria.silva@email.com", "70000-000", "12.345.678-9", "91234-5678"):
+        assert pii not in out
+
+
+def test_redact_overlapping_and_adjacent_spans():
+    text = "abc 123.456.789-10 xyz"
+    # sobrepostos (o segundo termina depois), contido e colado: cada grupo vira uma máscara só
+    assert redact(text, [("cpf", 4, 18), ("rg", 6, 20)]) == "abc [CPF]yz"
+    assert redact(text, [("cpf", 4, 18), ("phone", 8, 14)]) == "abc [CPF] xyz"
+    assert redact(text, [("cpf", 4, 11), ("phone", 11, 18)]) == "abc [CPF][PHONE] xyz"
+
+
+def test_redact_types_filter():
+    text = "Maria Silva, e-mail maria.silva@email.com, CPF 123.456.789-10"
+    assert _redacted(text) == "Maria Silva, e-mail [EMAIL], CPF [CPF]"  # nomes não são mascarados por padrão
+    assert _redacted(text, types=("email",)) == "Maria Silva, e-mail [EMAIL], CPF 123.456.789-10"
+    assert _redacted(text, types=("name",)) == "[NAME], e-mail maria.silva@email.com, CPF 123.456.789-10"
+
+
+def test_redacted_corpus_has_no_pii_left():
+    for t in CORPUS:
+        out = _redacted(t)
+        assert not [s for s in scan_spans(out)[1] if s[0] in REDACT_TYPES], (t, out)
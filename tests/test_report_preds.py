@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.io.load_data import iter_frames, read_frame, table_columns
+from src.models import report_preds
+from src.models.predict_hybrid import score_texts
+from src.models.report_preds import QUANTILE_BINS, REPORT_COLUMNS, StreamingReport, report_in_memory
+
+TOP = 10
+THR = 0.30
+# centro da faixa borderline do relatório: [0.05, 0.15) tem dezenas de linhas no tiny_corpus
+BORDER_THR = 0.10
+
+
+def _captured(monkeypatch, fn) -> dict:
+    """Argumentos que o relatório passa a _print_report (o que seria impresso)."""
+    seen = {}
+
+    def capture(n, label_counts, describe, buckets, signals, top, border, thr, cascade=False):
+        seen.update(n=n, label_counts=label_counts, describe=describe, buckets=buckets,
+                    signals=signals, top=top, border=border, cascade=cascade)
+
+    monkeypatch.setattr(report_preds, "_print_report", capture)
+    fn()
+    return seen
+
+
+@pytest.fixture(params=[False, True], ids=["normal", "cascade"])
+def preds_csv(request, tiny_bundle, tiny_texts, tmp_path):
+    texts = tiny_texts * 3  # ~1800 linhas, com textos (e scores) repetidos
+    df = score_texts(tiny_bundle, [str(i) for i in range(len(texts))], texts, 0.3, THR, cascade=request.param)
+    path = tmp_path / "preds.csv"
+    df.to_csv(path, index=False)
+    return path
+
+
+@pytest.mark.parametrize("chunk_size", [97, 1000])
+def test_streaming_report_matches_in_memory(monkeypatch, preds_csv, chunk_size):
+    usecols = [c for c in REPORT_COLUMNS if c in table_columns(preds_csv)]
+    mem = _captured(monkeypatch, lambda: report_in_memory(read_frame(preds_csv, usecols), TOP, BORDER_THR))
+
+    def streaming():
+        report = StreamingReport(TOP, BORDER_THR)
+        for df in iter_frames(preds_csv, chunk_size, usecols):
+            report.add(df)
+        report.print()
+
+    st = _captured(monkeypatch, streaming)
+
+    assert st["n"] == mem["n"]
+    assert st["cascade"] == mem["cascade"]
+    assert st["signals"] == mem["signals"]
+    assert st["label_counts"].sort_index().tolist() == mem["label_counts"].sort_index().tolist()
+    assert st["buckets"].tolist() == mem["buckets"].tolist()
+
+    d_st, d_mem = st["describe"], mem["describe"]
+    assert d_st["count"] == d_mem["count"]
+    for k in ("mean", "std"):
+        assert d_st[k] == pytest.approx(d_mem[k], rel=1e-9, abs=1e-12)
+    for k in ("min", "max"):
+        assert d_st[k] == d_mem[k]
+    for k in ("25%", "50%", "75%"):
+        assert abs(d_st[k] - d_mem[k]) <= 1.0 / QUANTILE_BINS
+
+    # empates podem trazer ids diferentes no corte; os scores do top-N/borderline são os mesmos
+    assert len(mem["border"]) == TOP
+    for part in ("top", "border"):
+        np.testing.assert_array_equal(st[part]["pred_score"].to_numpy(), mem[part]["pred_score"].to_numpy())
+
+
+def test_cascade_report_ignores_decided_rows(monkeypatch, tiny_bundle, tiny_texts, tmp_path):
+    df = score_texts(tiny_bundle, [str(i) for i in range(len(tiny_texts))], tiny_texts, 0.3, THR, cascade=True)
+    ml = df[df["decided_by"] == "ml"]
+    # saída antiga do --cascade: decididos com a parte do regex no pred_score
+    old = df.assign(pred_score=df["pred_score"].fillna(0.7 * df["regex_score"]))
+    seen = _captured(monkeypatch, lambda: report_in_memory(old, TOP, THR))
+    assert seen["describe"]["count"] == len(ml)
+    assert seen["describe"]["max"] == ml["pred_score"].max()
+    assert seen["buckets"].sum() == len(ml)
+    assert pd.Series(seen["top"]["id"]).isin(ml["id"]).all()
@@ -0,0 +1,12 @@
+from __future__ import annotations
+
+from src.bench.startup import _tiny_input, budget_failures, measure_mode, ml_stack_import_ms
+
+
+def test_regex_mode_startup_within_budget(tmp_path):
+    input_path = tmp_path / "tiny.csv"
+    _tiny_input(input_path)
+    # processo novo com -X importtime: no processo do pytest outros testes já importaram a pilha de ML
+    regex = measure_mode("regex", input_path, "sem-modelo.joblib", tmp_path)
+    assert (tmp_path / "preds_regex.csv").exists()
+    assert budget_failures(regex, ml_stack_import_ms()) == []
@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from src.models.sweep import sweep
+
+_ML = np.array([0.1, 0.6, 0.9])
+_RX = np.array([0.0, 0.35, 0.7])
+
+
+@pytest.mark.parametrize("alpha", [-0.1, 1.5, float("nan")])
+def test_alpha_outside_unit_interval_is_rejected(alpha):
+    with pytest.raises(ValueError, match="alpha"):
+        sweep(_ML, _RX, [0.5, alpha], [0.3], [0.35])
+
+
+def test_alpha_bounds_are_accepted():
+    df = sweep(_ML, _RX, [0.0, 1.0], [0.3], [0.35])
+    assert sorted(df["alpha"].tolist()) == [0.0, 1.0]
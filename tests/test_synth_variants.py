@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import random
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from src.io.schemas import RecordBatch
+from src.models.make_synth_dataset import _inject_batch, source_id, variant_pos_prob
+from src.models.train_hybrid import _is_val, _source_index
+
+_BATCH = RecordBatch([str(i) for i in range(400)], [f"pedido de informação número {i}" for i in range(400)])
+
+
+def test_clean_negative_at_most_once_per_record():
+    generated = _inject_batch(_BATCH, random.Random(7), pos_ratio=0.3, variants=4)
+    clean = Counter(source_id(rid) for rid, _, y, _ in generated if y == 0)
+    assert clean and max(clean.values()) == 1
+    texts = Counter((source_id(rid), text) for rid, text, y, _ in generated if y == 0)
+    assert max(texts.values()) == 1
+
+
+@pytest.mark.parametrize("variants", [1, 3, 5])
+@pytest.mark.parametrize("pos_ratio", [0.3, 0.5])
+def test_pos_ratio_holds_after_dedup(variants, pos_ratio):
+    batch = RecordBatch([str(i) for i in range(20_000)], ["pedido"] * 20_000)
+    labels = [y for _, _, y, _ in _inject_batch(batch, random.Random(3), pos_ratio, variants)]
+    assert abs(np.mean(labels) - pos_ratio) < 0.01
+    if variants == 1:
+        assert variant_pos_prob(pos_ratio, variants) == pos_ratio
+
+
+def test_single_variant_keeps_row_index():
+    src, prev = _source_index(["10", "11", "12"])
+    assert src.tolist() == [0, 1, 2] and prev == "12"
+
+
+def test_variants_stay_on_one_side_across_chunks():
+    ids = [rid for rid, *_ in _inject_batch(_BATCH, random.Random(7), pos_ratio=0.5, variants=3)]
+    n_src, prev, val = 0, None, []
+    for start in range(0, len(ids), 37):  # chunks que cortam as variantes de um registro
+        idx, prev = _source_index(ids[start:start + 37], n_src, prev)
+        n_src = int(idx[-1]) + 1
+        val.append(_is_val(idx, seed=42))
+    val = np.concatenate(val)
+    sides = {}
+    for rid, v in zip(ids, val):
+        sides.setdefault(source_id(rid), set()).add(bool(v))
+    assert n_src == len(_BATCH)
+    assert all(len(s) == 1 for s in sides.values())